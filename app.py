@@ -1,14 +1,21 @@
 import eventlet
 eventlet.monkey_patch()
 
-from flask import Flask
+# Let database queries yield to other green threads (before any connection is made)
+from models.green_db import make_psycopg_green, check_green_db
+make_psycopg_green()
+
+from flask import Flask, g
 from flask_login import LoginManager
 from models.base_content import base_content
+from models.migrations import upgrade
 from flask_socketio import SocketIO
 import os
 from config import config
 from dotenv import load_dotenv
 from models.database import db
+from models.sqlite_tuning import tune_sqlite
+from models.metrics import instrument_app, instrument_engine
 
 # Initialise Socket.IO
 socketio = SocketIO()
@@ -16,8 +23,11 @@ socketio = SocketIO()
 # Load .env file and its variables
 load_dotenv()
 
-def create_app(config_name=os.environ.get('FLASK_ENV')):
-    """Start application"""
+def create_app(config_name=os.environ.get('FLASK_ENV'), start_services=True):
+    """Start application
+    
+    start_services -- start background services (growth scheduler),
+    scripts that only need database access can turn this off"""
     app = Flask(__name__)
     app.config.from_object(config[config_name]) # Get configuration type
     config[config_name].init_app()
@@ -31,7 +41,14 @@ def create_app(config_name=os.environ.get('FLASK_ENV')):
 
     # Initialise Socket.IO with app
     # Limit allowed origins for security
-    socketio.init_app(app, cors_allowed_origins=app.config['CORS_ORIGINS'], async_mode="eventlet")
+    # Workers share broadcasts through the message queue (if set)
+    socketio.init_app(
+        app,
+        cors_allowed_origins=app.config['CORS_ORIGINS'],
+        async_mode="eventlet",
+        message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+        channel=app.config['SOCKETIO_CHANNEL']
+    )
 
     # Initialise Socket.IO events
     from sockets.events import init_socket_events
@@ -43,26 +60,52 @@ def create_app(config_name=os.environ.get('FLASK_ENV')):
     def load_user(id):
         return User.query.get(id)
 
+    @app.after_request
+    def report_db_stats(response):
+        """Report how many flushes and commits the request's unit of work made"""
+        stats = g.get('db_stats')
+        if stats:
+            response.headers['X-DB-Flushes'] = str(stats['flushes'])
+            response.headers['X-DB-Commits'] = str(stats['commits'])
+        return response
+
+    # Time every request by endpoint
+    instrument_app(app)
+
     # Register blueprints
     from routes.auth import auth
     from routes.views import views
     from routes.rooms import rooms
     from routes.game import game
+    from routes.metrics import metrics
     
     app.register_blueprint(auth, url_prefix='/')
     app.register_blueprint(views, url_prefix='/')
     app.register_blueprint(rooms, url_prefix='/')
     app.register_blueprint(game, url_prefix='/')
+    app.register_blueprint(metrics, url_prefix='/')
 
-    # Create database if one doesnt exist
+    # Create database if one doesnt exist, or bring an existing one up to date
     with app.app_context():
-        db.create_all()
+        tune_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+        instrument_engine(db.engine)
+        check_green_db(app, db.engine)
+        upgrade()
         # Add base data
         base_content()
         print(f'Database ready at: {app.config["SQLALCHEMY_DATABASE_URI"]}')
 
+    # Start marking plants ready as they finish growing
+    if start_services:
+        from sockets.growth_scheduler import scheduler
+        from sockets.chat_buffer import chat_buffer
+        scheduler.start(app)
+        # Save chat messages in the background
+        chat_buffer.start(app)
+
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    socketio.run(app, debug=app.config['DEBUG']) # Set debug type
\ No newline at end of file
+    # PORT lets several workers run side by side (see README)
+    socketio.run(app, port=int(os.environ.get('PORT', 5000)), debug=app.config['DEBUG']) # Set debug type
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
-from sqlalchemy.pool import NullPool
+from models.db_pool import engine_options
+from models.sqlite_tuning import SQLITE_PROFILES
+from models.green_db import psycopg2_url
 
 class Config:
     """Base configuration settings"""
@@ -13,10 +15,36 @@ class Config:
     SESSION_LIFETIME = timedelta(days=3)
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database connection pool ('queue' reuses connections, 'null' opens one per checkout)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        pool=os.environ.get('DB_POOL', 'queue'),
+        size=int(os.environ.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    )
+
+    # SQLite PRAGMAs set on every connection ('tuned' or 'default', ignored by other databases)
+    SQLITE_PRAGMAS = SQLITE_PROFILES[os.environ.get('SQLITE_PROFILE', 'tuned')]
     
     # Get secret key from .env file
     SECRET_KEY = os.environ.get('SECRET_KEY')
 
+    # Socket.IO message queue shared by every worker (e.g. redis://localhost:6379/0)
+    # Leave unset when running a single worker
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'seedlings')
+
+    # Bearer token Prometheus scrapes /metrics with (admins can always view it)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Chat write-behind buffer
+    CHAT_FLUSH_INTERVAL = 0.25 # Seconds between bulk inserts
+    CHAT_FLUSH_SIZE = 200 # Most messages per bulk insert
+    CHAT_MAX_PENDING = 10000 # Senders wait for a flush past this many unsaved messages
+    CHAT_WORKER_ID = int(os.environ['CHAT_WORKER_ID']) if os.environ.get('CHAT_WORKER_ID') else None # Unique per worker, required with SOCKETIO_MESSAGE_QUEUE (a lone worker defaults to its process ID)
+
     @staticmethod
     def init_app():
         """Create instance directory if it doesn't exist"""
@@ -29,7 +57,7 @@ class DevelopmentConfig(Config):
 
     DEBUG = True    
     DB_NAME = 'seedlings.db'
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(Config.INSTANCE_DIR, DB_NAME)}'
+    SQLALCHEMY_DATABASE_URI = psycopg2_url(os.environ.get('DEV_DATABASE_URL')) or f'sqlite:///{os.path.join(Config.INSTANCE_DIR, DB_NAME)}'
 
     CORS_ORIGINS = [
         'http://loacalhost:5000',
@@ -40,10 +68,7 @@ class ProductionConfig(Config):
     """Production configuration settings"""
 
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") # Get db URL for Render
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "poolclass":NullPool
-    }
+    SQLALCHEMY_DATABASE_URI = psycopg2_url(os.environ.get("DATABASE_URL")) # Get db URL for Render (on psycopg2, so queries don't block the worker)
     CORS_ORIGINS = ["https://seedlings-5fgm.onrender.com"]
 
 # Dictionary of configurations
@@ -0,0 +1,129 @@
+from models.database import db
+from models.loot_sampler import LootSampler
+from types import MappingProxyType
+import random
+import time
+
+# How often a worker checks for a newer catalog version (seconds)
+VERSION_CHECK_INTERVAL = 5
+
+# Catalog version every worker checks (one row, built by db.create_all() or migration 8)
+catalog_versions = db.Table(
+    'catalog_version',
+    db.Column('version', db.Integer, nullable=False)
+)
+
+class Record:
+    """Read-only record, fields are set once by the constructor"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id} {self.name}>'
+
+class PlantRecord(Record):
+    __slots__ = ('id', 'name', 'rarity', 'min_value', 'max_value')
+
+    def roll_value(self):
+        """Get a random sell value for a harvested plant"""
+        return random.randint(self.min_value, self.max_value)
+
+class SeedRecord(Record):
+    __slots__ = ('id', 'name', 'description', 'cost', 'min_time', 'max_time', 'loot_table', 'sampler')
+
+    def roll_growth_time(self):
+        """Get a random growth time for a planted seed"""
+        return random.randint(self.min_time, self.max_time)
+
+class Catalog:
+    """Snapshot of every seed, plant and loot table
+
+    loot_table -- tuple of (PlantRecord, weight) on each SeedRecord
+    sampler    -- LootSampler of plant IDs (None for an empty loot table)"""
+
+    __slots__ = ('version', 'seeds', 'plants', 'seeds_by_name', 'plants_by_name')
+
+    def __init__(self, version, seeds, plants):
+        self.version = version
+        self.seeds = MappingProxyType({seed.id: seed for seed in seeds})
+        self.plants = MappingProxyType({plant.id: plant for plant in plants})
+        self.seeds_by_name = MappingProxyType({seed.name: seed for seed in seeds})
+        self.plants_by_name = MappingProxyType({plant.name: plant for plant in plants})
+
+    def roll_plants(self, seed_id, k=1):
+        """Get k random plants from a seed's loot table"""
+        seed = self.seeds.get(seed_id)
+        if not seed or not seed.sampler:
+            raise ValueError(f"Error: No plants found in '{seed.name if seed else seed_id}' loot table")
+        return [self.plants[plant_id] for plant_id in seed.sampler.sample(k)]
+
+def load_catalog(version):
+    """Build a catalog from the database (one query per table)"""
+    from models.plant import Plant
+    from models.seed import Seed
+    from models.loot_table import LootTable
+
+    plants = [PlantRecord(*row) for row in db.session.execute(
+        db.select(Plant.id, Plant.name, Plant.rarity, Plant.min_value, Plant.max_value).order_by(Plant.id)
+    )]
+    plants_by_id = {plant.id: plant for plant in plants}
+
+    loot_tables = {}
+    for row in db.session.execute(
+        db.select(LootTable.seed_id, LootTable.plant_id, LootTable.weight).order_by(LootTable.id)
+    ):
+        if row.plant_id in plants_by_id:
+            loot_tables.setdefault(row.seed_id, []).append((plants_by_id[row.plant_id], row.weight))
+
+    seeds = []
+    for row in db.session.execute(
+        db.select(Seed.id, Seed.name, Seed.description, Seed.cost, Seed.min_time, Seed.max_time).order_by(Seed.id)
+    ):
+        loot_table = tuple(loot_tables.get(row.id, ()))
+        sampler = None
+        if loot_table:
+            sampler = LootSampler([plant.id for plant, _ in loot_table], [weight for _, weight in loot_table])
+        seeds.append(SeedRecord(*row, loot_table, sampler))
+
+    return Catalog(version, seeds, plants)
+
+# Process-level catalog and when to next check its version
+_catalog = None
+_next_check = 0
+
+def get_catalog_version():
+    """Get the catalog version, bumped whenever content changes"""
+    return db.session.execute(db.select(catalog_versions.c.version)).scalar() or 0
+
+def bump_catalog_version():
+    """Make every worker reload the catalog (commit with the content change)"""
+    if not db.session.execute(db.update(catalog_versions).values(version=catalog_versions.c.version + 1)).rowcount:
+        db.session.execute(db.insert(catalog_versions).values(version=1))
+    invalidate_catalog()
+
+def get_catalog():
+    """Get the content catalog, reloading it if another process changed the content"""
+    global _catalog, _next_check
+
+    now = time.monotonic()
+    if _catalog is None or now >= _next_check:
+        version = get_catalog_version()
+        if _catalog is None or version != _catalog.version:
+            _catalog = load_catalog(version)
+        _next_check = now + VERSION_CHECK_INTERVAL
+    return _catalog
+
+def invalidate_catalog():
+    """Drop this process' catalog, it is reloaded on next use"""
+    global _catalog
+    _catalog = None
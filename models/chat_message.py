@@ -1,13 +1,21 @@
 from models.database import db
 from datetime import datetime, timezone
+import base64
 
 class ChatMessage(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=False) # Time-ordered ID assigned by the chat buffer
     message_content = db.Column(db.String(500), nullable=False)
     timestamp = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
 
+    # Indexes
+
+    __table_args__ = (
+        # Room chat history in time order (keyset pagination on timestamp, id)
+        db.Index('ix_chat_message_room_timestamp_id', 'room_id', 'timestamp', 'id'),
+    )
+
     # Relationships
 
     # Room
@@ -18,4 +26,59 @@ class ChatMessage(db.Model):
     def __init__(self, message_content, room_id, user_id):
         self.message_content = message_content
         self.room_id = room_id
-        self.user_id = user_id
\ No newline at end of file
+        self.user_id = user_id
+
+    @staticmethod
+    def encode_cursor(timestamp, message_id):
+        """Encode a message's position in the history as an opaque cursor"""
+        return base64.urlsafe_b64encode(f'{timestamp.isoformat()}|{message_id}'.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor to (timestamp, message ID), raises ValueError if invalid"""
+        try:
+            timestamp, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(timestamp), int(message_id)
+        except Exception:
+            raise ValueError('Invalid cursor')
+
+    @classmethod
+    def get_history(cls, room_id, before=None, limit=50):
+        """Get a page of a room's chat history (newest first in the database,
+        returned oldest first) and the cursor for the page before it"""
+        from models.user import User
+
+        # Keyset pagination - each page is an index range scan on
+        # (room_id, timestamp, id), however much history the room has
+        query = db.session.query(
+            cls.id,
+            cls.message_content,
+            cls.timestamp,
+            User.username
+        ).join(
+            User, User.id == cls.user_id
+        ).filter(cls.room_id == room_id)
+
+        if before:
+            timestamp, message_id = cls.decode_cursor(before)
+            query = query.filter(db.tuple_(cls.timestamp, cls.id) < db.tuple_(timestamp, message_id))
+
+        # Fetch one extra row to know if there is an older page
+        rows = query.order_by(cls.timestamp.desc(), cls.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        messages = []
+        for row in reversed(rows):
+            timestamp = row.timestamp
+            if not timestamp.tzinfo:
+                timestamp = timestamp.replace(tzinfo=timezone.utc) # SQLite returns naive UTC datetimes
+            messages.append({
+                'id': str(row.id), # 64-bit IDs don't fit in a JavaScript number
+                'message_content': row.message_content,
+                'timestamp': timestamp.isoformat(),
+                'user': row.username
+            })
+
+        cursor = cls.encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
+        return messages, cursor
@@ -1,3 +1,75 @@
+from flask import g, current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+def commit():
+    """Commit the session, or only flush (stage) the changes
+    if a unit of work is active - it will commit at its boundary"""
+    if has_app_context() and 'unit_of_work' in g:
+        db.session.flush()
+    else:
+        db.session.commit()
+
+def upsert(model):
+    """Get an INSERT that supports on_conflict_do_update() for the database in use
+
+    Returns None for databases without one (callers fall back to read-then-write)"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+def savepoint():
+    """Begin a SAVEPOINT in the session's transaction (use with "with")
+
+    pysqlite only begins a transaction before DML, and SQLite commits a
+    SAVEPOINT made outside one when it is released, so the transaction is
+    begun first - otherwise a later rollback wouldn't undo it"""
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        dbapi_connection = connection.connection.dbapi_connection
+        if not dbapi_connection.in_transaction:
+            dbapi_connection.execute('BEGIN')
+    return db.session.begin_nested()
+
+def unit_of_work(f):
+    """Run a route or socket handler as a single unit of work
+
+    Model helpers only stage changes while it is active, so the handler's
+    own commit (or rollback) is the only one made. The number of flushes
+    and commits is saved to g.db_stats and logged."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.unit_of_work = {'flushes': 0, 'commits': 0}
+        try:
+            return f(*args, **kwargs)
+        except Exception:
+            # Nothing from a failed handler is kept
+            db.session.rollback()
+            raise
+        finally:
+            g.db_stats = g.pop('unit_of_work')
+            current_app.logger.debug(
+                f'{f.__name__}: {g.db_stats["flushes"]} flush(es), {g.db_stats["commits"]} commit(s)'
+            )
+    return decorated
+
+# Count flushes and commits made during a unit of work
+
+@event.listens_for(Session, 'after_flush')
+def count_flush(session, flush_context):
+    if has_app_context() and 'unit_of_work' in g:
+        g.unit_of_work['flushes'] += 1
+
+@event.listens_for(Session, 'after_commit')
+def count_commit(session):
+    if has_app_context() and 'unit_of_work' in g:
+        g.unit_of_work['commits'] += 1
@@ -0,0 +1,96 @@
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, NullPool
+import time
+
+class MeteredPool:
+    """Connection pool mixin that records checkout waits and connections in use
+
+    The pools' locks and queues come from threading, which eventlet has
+    monkey patched by the time the engine is made (see app.py), so a green
+    thread waiting for a connection only blocks itself."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'max_in_use': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0
+        }
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics['timeouts'] += 1
+            raise
+        wait = time.perf_counter() - start
+
+        metrics = self.metrics
+        metrics['checkouts'] += 1
+        metrics['total_wait'] += wait
+        metrics['max_wait'] = max(metrics['max_wait'], wait)
+        metrics['in_use'] += 1
+        metrics['max_in_use'] = max(metrics['max_in_use'], metrics['in_use'])
+        return record
+
+    def _do_return_conn(self, record):
+        self.metrics['in_use'] -= 1
+        super()._do_return_conn(record)
+
+class MeteredQueuePool(MeteredPool, QueuePool):
+    """Fixed size pool (plus overflow) of reused connections"""
+
+class MeteredNullPool(MeteredPool, NullPool):
+    """Opens a new connection for every checkout"""
+
+# Engine profiles (selected by DB_POOL)
+POOLS = {
+    'queue': MeteredQueuePool,
+    'null': MeteredNullPool
+}
+
+def engine_options(pool='queue', size=5, max_overflow=10, timeout=30, recycle=1800):
+    """Get SQLAlchemy engine options for a pool profile
+
+    pool         -- 'queue' (reuse connections) or 'null' (connect every time)
+    size         -- connections kept open
+    max_overflow -- extra connections opened under load (closed when returned)
+    timeout      -- seconds to wait for a connection before giving up
+    recycle      -- seconds before a connection is replaced (stops the
+                    server or a proxy closing it while it sits idle)"""
+    if pool not in POOLS:
+        raise ValueError(f'Unknown database pool: {pool}')
+
+    options = {'poolclass': POOLS[pool]}
+    if pool == 'queue':
+        options.update(
+            pool_size=size,
+            max_overflow=max_overflow,
+            pool_timeout=timeout,
+            pool_recycle=recycle,
+            pool_pre_ping=True, # Replace connections dropped while idle
+            pool_use_lifo=True # Reuse the most recent connections, so extras go idle and get recycled
+        )
+    return options
+
+def pool_stats(engine):
+    """Get connection pool statistics for an engine"""
+    pool = engine.pool
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is None:
+        return {'pool': type(pool).__name__}
+
+    stats = dict(metrics)
+    stats['pool'] = type(pool).__name__
+    stats['avg_wait'] = metrics['total_wait'] / metrics['checkouts'] if metrics['checkouts'] else 0.0
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow()
+        )
+    return stats
@@ -0,0 +1,74 @@
+import eventlet
+from eventlet.hubs import trampoline
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """psycopg2 wait callback that waits for the socket in the eventlet hub
+
+    psycopg2 calls this instead of blocking inside libpq, so other green
+    threads keep running while a query is in flight."""
+    from psycopg2 import extensions, OperationalError
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise OperationalError(f'Bad result from poll: {state}')
+
+def make_psycopg_green():
+    """Make psycopg2 cooperative under eventlet (no-op if it isn't installed)"""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+
+    extensions.set_wait_callback(eventlet_wait_callback)
+    return True
+
+def psycopg2_url(url):
+    """Point a PostgreSQL URL at psycopg2, the driver make_psycopg_green() makes cooperative
+
+    postgres:// and postgresql:// URLs otherwise get SQLAlchemy's default
+    driver (psycopg 3 since SQLAlchemy 2.1), which blocks the worker on every
+    query. Other URLs (and ones that name a driver) are returned unchanged."""
+    if not url:
+        return url
+    scheme, _, rest = url.partition('://')
+    if scheme in ('postgres', 'postgresql'):
+        return f'postgresql+psycopg2://{rest}'
+    return url
+
+def green_db_status(engine):
+    """Check whether an engine's driver lets other green threads run during queries"""
+    driver = engine.dialect.driver
+    status = {
+        'driver': driver,
+        'monkey_patched': eventlet.patcher.is_monkey_patched('socket'),
+        'green': False
+    }
+
+    if driver == 'psycopg2':
+        from psycopg2 import extensions
+        status['green'] = status['monkey_patched'] and extensions.get_wait_callback() is eventlet_wait_callback
+    elif driver in ('pg8000', 'pymysql'):
+        # Pure Python drivers use the monkey patched socket module
+        status['green'] = status['monkey_patched']
+    return status
+
+def check_green_db(app, engine):
+    """Startup self-check: warn if database queries will block the worker"""
+    status = green_db_status(engine)
+    if status['green']:
+        app.logger.info(f'Database driver {status["driver"]} is cooperative under eventlet')
+    elif engine.dialect.name == 'sqlite':
+        app.logger.info('SQLite queries block the worker while they run (fine for development)')
+    else:
+        app.logger.warning(
+            f'Database driver {status["driver"]} blocks every green thread while a query runs '
+            f'(monkey patched: {status["monkey_patched"]})'
+        )
+    return status
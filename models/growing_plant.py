@@ -1,7 +1,6 @@
 from models.database import db
-from models.seed import Seed
+from models.catalog import get_catalog
 from datetime import datetime, timedelta, timezone
-import random
 
 class GrowingPlant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -9,7 +8,17 @@ class GrowingPlant(db.Model):
     seed_id = db.Column(db.Integer, db.ForeignKey('seed.id', ondelete='CASCADE'), nullable=False)
     planted_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     growth_time = db.Column(db.Integer, nullable=False)
-    is_ready = db.Column(db.Boolean, default=False)
+    ready_at = db.Column(db.DateTime(timezone=True), nullable=False) # planted_at + growth_time, written once at planting
+    is_ready = db.Column(db.Boolean, default=False) # Set by the growth scheduler once the owner has been notified
+
+    # Indexes
+
+    __table_args__ = (
+        # "What's ready/growing for this User" range scans
+        db.Index('ix_growing_plant_user_ready_at', 'user_id', 'ready_at'),
+        # Growth scheduler's "what's ready soon" range scans
+        db.Index('ix_growing_plant_ready_at', 'ready_at'),
+    )
 
     # Relationships
 
@@ -23,49 +32,33 @@ class GrowingPlant(db.Model):
         self.user_id = user_id
         self.seed_id = seed_id
 
-        # Fetch the seed used to get the min/max growth times
-        used_seed = Seed.query.get(self.seed_id)
+        # Choose the actual growth time for this plant instance from the seed's min/max growth times
+        self.growth_time = get_catalog().seeds[self.seed_id].roll_growth_time()
+
+        # Work out when it will be ready once, instead of on every read
+        self.planted_at = datetime.now(timezone.utc)
+        self.ready_at = self.planted_at + timedelta(seconds=self.growth_time)
+
+    @staticmethod
+    def ready_filter(now=None):
+        """SQL filter for plants that have finished growing"""
+        return GrowingPlant.ready_at <= (now or datetime.now(timezone.utc))
 
-        # Choose the actual growth time for this plant instance
-        self.growth_time = random.randint(used_seed.min_time, used_seed.max_time)
+    def get_ready_at(self):
+        """Get the time the plant finishes growing (timezone-aware)"""
+        ready_at = self.ready_at
+        if not ready_at.tzinfo:
+            ready_at = ready_at.replace(tzinfo=timezone.utc) # SQLite returns naive UTC datetimes
+        return ready_at
 
     def is_harvestable(self):
         """Check if the plant is ready to harvest"""
-        if self.is_ready:
-            return self.is_ready
-        
-        now = datetime.now(timezone.utc)
-        
-        planted_at = self.planted_at
-        if not planted_at.tzinfo:
-            planted_at = planted_at.replace(tzinfo=timezone.utc)
-            
-        harvest_time = planted_at + timedelta(seconds=self.growth_time)
-        ready = now >= harvest_time
-
-        if ready:
-            self.is_ready = True
-            db.session.commit()
-        
-        return ready
+        return datetime.now(timezone.utc) >= self.get_ready_at()
     
     def time_remaining(self):
         """Get the time remaining until fully grown in seconds"""
-        if self.is_ready:
-            return 0
-        
-        now = datetime.now(timezone.utc)
-        
-        planted_at = self.planted_at
-        if not planted_at.tzinfo:
-            planted_at = planted_at.replace(tzinfo=timezone.utc)
-            
-        harvest_time = planted_at + timedelta(seconds=self.growth_time)
-
-        if now >= harvest_time:
-            return 0
-        
-        return (harvest_time - now).total_seconds()
+        remaining = (self.get_ready_at() - datetime.now(timezone.utc)).total_seconds()
+        return max(0, remaining)
 
     def harvest(self):
         """Harvest the grown seed and collect and random plant"""
@@ -74,11 +67,9 @@ class GrowingPlant(db.Model):
             raise ValueError(f'Plant is not ready for harvest! {remaining} seconds remaining.')
         
         # Select a random plant from the seeds loot table
-        plant = self.seed.generate_random_plant()
+        plant = get_catalog().roll_plants(self.seed_id)[0]
 
         # Get plant value
-        plant_value = random.randint(plant.min_value, plant.max_value)
-
-        db.session.commit()
+        plant_value = plant.roll_value()
 
         return plant, plant_value
\ No newline at end of file
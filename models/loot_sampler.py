@@ -0,0 +1,62 @@
+from random import random, randrange
+
+class LootSampler:
+    """Compiled alias table (Vose's method) for a seed's loot table,
+    draws a plant ID in O(1) regardless of loot table size"""
+
+    __slots__ = ('plant_ids', 'prob', 'alias')
+
+    def __init__(self, plant_ids, weights):
+        if not plant_ids:
+            raise ValueError('Cannot build a sampler for an empty loot table')
+
+        n = len(plant_ids)
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError('Loot table weights must add up to more than 0')
+
+        # Scale weights so the average bucket has probability 1
+        scaled = [weight * n / total for weight in weights]
+        prob = [0.0] * n
+        alias = [0] * n
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        # Pair each under-full bucket with an over-full bucket
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Remaining buckets are full (floating point leftovers)
+        for i in large + small:
+            prob[i] = 1.0
+
+        self.plant_ids = tuple(plant_ids)
+        self.prob = tuple(prob)
+        self.alias = tuple(alias)
+
+    def draw(self):
+        """Draw a single plant ID"""
+        i = randrange(len(self.plant_ids))
+        return self.plant_ids[i] if random() < self.prob[i] else self.plant_ids[self.alias[i]]
+
+    def sample(self, k=1):
+        """Draw k plant IDs (with replacement)"""
+        plant_ids = self.plant_ids
+        prob = self.prob
+        alias = self.alias
+        n = len(plant_ids)
+
+        results = []
+        for _ in range(k):
+            i = randrange(n)
+            results.append(plant_ids[i] if random() < prob[i] else plant_ids[alias[i]])
+        return results
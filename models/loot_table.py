@@ -2,7 +2,7 @@ from models.database import db
 
 class LootTable(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    seed_id = db.Column(db.Integer, db.ForeignKey('seed.id', ondelete='CASCADE'), nullable=False)
+    seed_id = db.Column(db.Integer, db.ForeignKey('seed.id', ondelete='CASCADE'), nullable=False, index=True)
     plant_id = db.Column(db.Integer, db.ForeignKey('plant.id', ondelete='CASCADE'), nullable=False)
     weight = db.Column(db.Integer, nullable=False, default=100) # Percentage probability weight of an arbitrary plant
 
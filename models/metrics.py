@@ -0,0 +1,173 @@
+from flask import g, request, has_app_context
+from functools import wraps
+from sqlalchemy import event
+from bisect import bisect_left
+import time
+
+# Latency buckets (seconds), from a cached lookup to a stuck request
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every metric, in the order they are exported
+registry = []
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def format_value(value):
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metric:
+    """Metric exported in the Prometheus text format
+
+    Updates are plain dict operations - they never yield, so no lock is
+    needed between green threads.
+
+    collect -- function returning {label values: value}, called instead
+    of keeping the metric up to date when the value is cheap to read"""
+
+    type = None
+
+    def __init__(self, name, help, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self.series = {} # label values --> value
+        registry.append(self)
+
+    def samples(self):
+        """Get (suffix, label values, extra label, value) for each sample"""
+        if self.collect:
+            self.series = self.collect()
+        for values, value in self.series.items():
+            yield '', values, '', value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for suffix, values, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{format_labels(self.labels, values, extra)} {format_value(value)}')
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *values, amount=1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, *values, amount=1):
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def dec(self, *values, amount=1):
+        self.inc(*values, amount=-amount)
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, *values, value):
+        series = self.series.get(values)
+        if series is None:
+            # Count per bucket (not cumulative), then +Inf, then sum
+            series = self.series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for values, series in self.series.items():
+            total = 0
+            for bound, count in zip(self.buckets, series):
+                total += count
+                yield '_bucket', values, f'le="{bound:g}"', total
+            count = total + series[len(self.buckets)]
+            yield '_bucket', values, 'le="+Inf"', count
+            yield '_sum', values, '', series[-1]
+            yield '_count', values, '', count
+
+def render():
+    """Get every metric in the Prometheus text format"""
+    return '\n'.join(metric.render() for metric in registry) + '\n'
+
+# Requests and socket events
+
+http_requests = Counter('seedlings_http_requests_total', "HTTP requests handled", ('endpoint', 'method', 'status'))
+http_latency = Histogram('seedlings_http_request_duration_seconds', "HTTP request latency", ('endpoint',))
+http_in_progress = Gauge('seedlings_http_requests_in_progress', "HTTP requests being handled")
+socket_events = Counter('seedlings_socket_events_total', "Socket.IO events handled", ('event', 'outcome'))
+socket_latency = Histogram('seedlings_socket_event_duration_seconds', "Socket.IO event handler latency", ('event',))
+socket_connections = Gauge('seedlings_socket_connections', "Authenticated Socket.IO connections")
+
+# SQL, by the endpoint or socket event that ran it ('background' for services)
+sql_statements = Counter('seedlings_sql_statements_total', "SQL statements executed", ('endpoint',))
+sql_time = Counter('seedlings_sql_duration_seconds_total', "Time spent executing SQL statements", ('endpoint',))
+
+def metrics_label():
+    if has_app_context():
+        return g.get('metrics_label', 'background')
+    return 'background'
+
+def instrument_app(app):
+    """Time every request by endpoint (e.g. game.get_inv)"""
+    @app.before_request
+    def start_timer():
+        g.metrics_label = request.endpoint or 'unmatched'
+        g.metrics_start = time.perf_counter()
+        http_in_progress.inc()
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def observe_request(exc=None):
+        # Teardown runs even when a view raises (counted as a 500)
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            http_in_progress.dec()
+            label = g.metrics_label
+            http_latency.observe(label, value=time.perf_counter() - start)
+            http_requests.inc(label, request.method, str(g.pop('metrics_status', 500)))
+
+def observe_event(f):
+    """Time a Socket.IO event handler (named after the event)"""
+    event_name = f.__name__
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.metrics_label = f'socket.{event_name}'
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = f(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            socket_latency.observe(event_name, value=time.perf_counter() - start)
+            socket_events.inc(event_name, outcome)
+    return decorated
+
+def instrument_engine(engine):
+    """Count SQL statements and their time"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_start'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def observe_statement(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop('metrics_start', None)
+        if start is not None:
+            label = metrics_label()
+            sql_statements.inc(label)
+            sql_time.inc(label, amount=time.perf_counter() - start)
@@ -0,0 +1,203 @@
+from models.database import db
+from sqlalchemy import inspect, text, Table, MetaData, Column, Integer, String
+
+def has_column(table, column):
+    """Check if a column exists in the connected database"""
+    return column in {col['name'] for col in inspect(db.session.connection()).get_columns(table)}
+
+def create_indexes(model):
+    """Create a model's (or table's) indexes that don't exist yet"""
+    connection = db.session.connection()
+    for index in getattr(model, '__table__', model).indexes:
+        index.create(bind=connection, checkfirst=True)
+
+def add_user_inventory_version():
+    """Add the User inventory version counter used for inventory ETags"""
+    if not has_column('user', 'inventory_version'):
+        db.session.execute(text('ALTER TABLE "user" ADD COLUMN inventory_version INTEGER NOT NULL DEFAULT 0'))
+
+def add_growing_plant_ready_at():
+    """Add GrowingPlant.ready_at, backfill it from planted_at + growth_time and index it"""
+    from models.growing_plant import GrowingPlant
+    from datetime import timedelta, timezone
+
+    if not has_column('growing_plant', 'ready_at'):
+        db.session.execute(text('ALTER TABLE growing_plant ADD COLUMN ready_at TIMESTAMP WITH TIME ZONE'
+                                if db.engine.dialect.name == 'postgresql' else
+                                'ALTER TABLE growing_plant ADD COLUMN ready_at DATETIME'))
+
+    # Backfill existing rows in one executemany
+    rows = db.session.query(GrowingPlant.id, GrowingPlant.planted_at, GrowingPlant.growth_time).filter(
+        GrowingPlant.ready_at.is_(None)
+    ).all()
+    if rows:
+        updates = []
+        for row in rows:
+            planted_at = row.planted_at
+            if not planted_at.tzinfo:
+                planted_at = planted_at.replace(tzinfo=timezone.utc)
+            updates.append({'id': row.id, 'ready_at': planted_at + timedelta(seconds=row.growth_time)})
+        db.session.execute(db.update(GrowingPlant), updates)
+
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('ALTER TABLE growing_plant ALTER COLUMN ready_at SET NOT NULL'))
+
+    create_indexes(GrowingPlant)
+
+def add_hot_path_indexes():
+    """Index the foreign keys hot paths filter on and make
+    UserPlantRecord unique per (user_id, plant_id)"""
+    from models.user import User
+    from models.loot_table import LootTable
+    from models.chat_message import ChatMessage
+    from models.user_plant_record import UserPlantRecord
+
+    # PlantInv as it was at this version (migration 6 replaces it with plant_stack)
+    plant_inv = Table(
+        'plant_inv', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('user_id', String(36), nullable=False, index=True),
+        Column('plant_id', Integer, nullable=False),
+        Column('value', Integer, nullable=False)
+    )
+
+    # Merge duplicate plant records so the unique index can be built
+    duplicates = db.session.query(
+        UserPlantRecord.user_id,
+        UserPlantRecord.plant_id
+    ).group_by(
+        UserPlantRecord.user_id,
+        UserPlantRecord.plant_id
+    ).having(db.func.count(UserPlantRecord.id) > 1).all()
+
+    for user_id, plant_id in duplicates:
+        records = UserPlantRecord.query.filter_by(user_id=user_id, plant_id=plant_id).order_by(UserPlantRecord.id).all()
+        keep = records[0]
+        for record in records[1:]:
+            keep.times_grown = (keep.times_grown or 0) + (record.times_grown or 0)
+            keep.first_discovered = min(filter(None, [keep.first_discovered, record.first_discovered]), default=None)
+            keep.last_grown = max(filter(None, [keep.last_grown, record.last_grown]), default=None)
+            db.session.delete(record)
+    db.session.flush()
+
+    for model in (plant_inv, User, LootTable, ChatMessage, UserPlantRecord):
+        create_indexes(model)
+
+def add_chat_history_index():
+    """Replace the (room_id, timestamp) chat index with
+    (room_id, timestamp, id) for keyset pagination"""
+    from models.chat_message import ChatMessage
+
+    db.session.execute(text('DROP INDEX IF EXISTS ix_chat_message_room_timestamp'))
+    create_indexes(ChatMessage)
+
+def widen_chat_message_id():
+    """Make chat message IDs 64-bit for the chat buffer's time-ordered IDs
+    (SQLite integer primary keys are already 64-bit)"""
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('ALTER TABLE chat_message ALTER COLUMN id TYPE BIGINT'))
+        db.session.execute(text('ALTER TABLE chat_message ALTER COLUMN id DROP DEFAULT'))
+
+def stack_plant_inventories():
+    """Replace plant_inv (one row per plant) with plant_stack (one row per
+    User per plant type, holding a count and a histogram of values)"""
+    from models.plant_stack import PlantStack, pack_values
+    from collections import Counter
+
+    connection = db.session.connection()
+    PlantStack.__table__.create(bind=connection, checkfirst=True)
+    if not inspect(connection).has_table('plant_inv'):
+        return
+
+    # Values are counted by the database, and read one stack at a time
+    rows = db.session.execute(text(
+        'SELECT user_id, plant_id, value, COUNT(*) AS count FROM plant_inv '
+        'GROUP BY user_id, plant_id, value ORDER BY user_id, plant_id'
+    ))
+    batch = []
+    key, values = None, Counter()
+    for row in rows:
+        if (row.user_id, row.plant_id) != key:
+            if values:
+                batch.append({'user_id': key[0], 'plant_id': key[1], 'count': values.total(), 'histogram': pack_values(values)})
+            key, values = (row.user_id, row.plant_id), Counter()
+        values[row.value] += row.count
+
+        if len(batch) >= 1000:
+            db.session.execute(db.insert(PlantStack), batch)
+            batch = []
+    if values:
+        batch.append({'user_id': key[0], 'plant_id': key[1], 'count': values.total(), 'histogram': pack_values(values)})
+    if batch:
+        db.session.execute(db.insert(PlantStack), batch)
+
+    db.session.execute(text('DROP TABLE plant_inv'))
+
+def add_content_version():
+    """Add the table recording which base content has been added (older
+    versions created it on first use, so it may already exist)"""
+    from models.base_content import content_versions
+
+    content_versions.create(bind=db.session.connection(), checkfirst=True)
+
+def add_catalog_version():
+    """Add the table every worker checks for catalog changes (older
+    versions created it on first use, so it may already exist)"""
+    from models.catalog import catalog_versions
+
+    catalog_versions.create(bind=db.session.connection(), checkfirst=True)
+
+# Ordered list of (version, description, migration function)
+# Fresh databases are built by db.create_all() and marked as fully migrated,
+# so migrations only ever run against databases from an older version
+MIGRATIONS = [
+    (1, 'Add user.inventory_version', add_user_inventory_version),
+    (2, 'Add growing_plant.ready_at with (user_id, ready_at) index', add_growing_plant_ready_at),
+    (3, 'Add hot path foreign key indexes and unique user_plant_record', add_hot_path_indexes),
+    (4, 'Add (room_id, timestamp, id) chat history index', add_chat_history_index),
+    (5, 'Widen chat_message.id to BIGINT', widen_chat_message_id),
+    (6, 'Replace plant_inv rows with plant_stack counts and value histograms', stack_plant_inventories),
+    (7, 'Add content_version', add_content_version),
+    (8, 'Add catalog_version', add_catalog_version),
+]
+
+def get_schema_version():
+    """Get the version of the last migration applied to the database"""
+    db.session.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    version = db.session.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    return version or 0
+
+def set_schema_version(version):
+    db.session.execute(text('INSERT INTO schema_version (version) VALUES (:version)'), {'version': version})
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def upgrade():
+    """Build a new database, or apply any migrations
+    newer than an existing database's schema version"""
+    # Stop several workers booting at once from migrating together
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('SELECT pg_advisory_xact_lock(7331)'))
+
+    if not inspect(db.session.connection()).has_table('user'):
+        # New database - build the current schema
+        print('Creating database schema')
+        db.metadata.create_all(bind=db.session.connection())
+        get_schema_version()
+        set_schema_version(latest_version())
+        db.session.commit()
+        return
+
+    current = get_schema_version()
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+
+        print(f'Applying migration {version}: {description}')
+        migrate()
+        set_schema_version(version)
+
+    # Migrations (and the advisory lock) are committed together
+    db.session.commit()
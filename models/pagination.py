@@ -0,0 +1,39 @@
+from bisect import bisect_left, bisect_right
+import base64
+import json
+
+def encode_cursor(key):
+    """Encode an item's sort key as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor to a sort key, raises ValueError if invalid"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, list):
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+def keyset_page(keys, after=None, limit=50, descending=False):
+    """Get the page of sort keys after a cursor and the cursor for the next page
+
+    Keys must be unique tuples (end them with the item's ID). Pages are cut by
+    key rather than offset, so items added or removed between requests don't
+    shift later pages."""
+    keys = sorted(keys)
+    try:
+        cursor = decode_cursor(after) if after else None
+        if descending:
+            end = bisect_left(keys, cursor) if cursor else len(keys)
+            start = max(end - limit, 0)
+            page, has_more = keys[start:end][::-1], start > 0
+        else:
+            start = bisect_right(keys, cursor) if cursor else 0
+            end = start + limit
+            page, has_more = keys[start:end], end < len(keys)
+    except TypeError:
+        # A cursor from another sort order
+        raise ValueError('Invalid cursor')
+    return page, encode_cursor(page[-1]) if has_more and page else None
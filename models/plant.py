@@ -2,6 +2,9 @@ from models.database import db
 from models.loot_table import LootTable
 from models.user_plant_record import UserPlantRecord
 
+# Rarities, most common first
+RARITIES = ('common', 'uncommon', 'rare', 'epic', 'legendary')
+
 class Plant(db.Model):
     id = db.Column(db.Integer, primary_key=True) # Unique identifier for each plant
     name = db.Column(db.String(100), nullable=False)
@@ -16,7 +19,7 @@ class Plant(db.Model):
     # User plant record
     user_records = db.relationship('UserPlantRecord', back_populates='plant', cascade='all, delete-orphan')
     # User through inventory
-    inventories = db.relationship('PlantInv', back_populates='plant', cascade='all, delete-orphan')
+    stacks = db.relationship('PlantStack', back_populates='plant', cascade='all, delete-orphan')
 
 
     def __init__(self, name, rarity, min_value, max_value):
@@ -0,0 +1,241 @@
+from models.database import db, upsert, savepoint
+from models.catalog import get_catalog
+from models.pagination import keyset_page
+from models.plant import RARITIES
+from collections import Counter
+import struct
+
+# Inventory entry IDs are plant_id * ENTRY_ID_SPAN + value, so one ID names
+# every plant of a type with the same value (values are 32-bit integers)
+ENTRY_ID_SPAN = 2 ** 31
+
+# Stacks read from the database at a time when streaming an inventory
+STREAM_BATCH = 100
+
+# Times a change to a User's stacks is tried before giving up, when
+# concurrent requests keep changing the same stacks first
+CHANGE_ATTEMPTS = 10
+
+# Inventory page sort orders (name --> sort key for a plant and value)
+PLANT_SORTS = {
+    'type': lambda plant, value: (),
+    'name': lambda plant, value: (plant.name.lower(),),
+    'value': lambda plant, value: (value,),
+    'rarity': lambda plant, value: (RARITIES.index(plant.rarity) if plant.rarity in RARITIES else len(RARITIES), plant.name.lower())
+}
+
+def entry_id(plant_id, value):
+    """Get the inventory entry ID for plants of a type with a value"""
+    return plant_id * ENTRY_ID_SPAN + value
+
+def split_entry_id(inv_entry_id):
+    """Get the (plant_id, value) an inventory entry ID names"""
+    return divmod(inv_entry_id, ENTRY_ID_SPAN)
+
+def pack_values(values):
+    """Pack a Counter of value --> count into bytes
+    (little endian unsigned 32-bit (value, count) pairs, sorted by value)"""
+    pairs = sorted(item for item in values.items() if item[1] > 0)
+    return struct.pack(f'<{len(pairs) * 2}I', *(number for pair in pairs for number in pair))
+
+def unpack_values(data):
+    """Unpack bytes from pack_values() into a Counter of value --> count"""
+    numbers = struct.unpack(f'<{len(data) // 4}I', data)
+    return Counter(dict(zip(numbers[::2], numbers[1::2])))
+
+def filter_plants(plants, rarity=None, name=None):
+    """Get the IDs of the plants with a rarity and/or part of a name
+    (case insensitive), or None if neither is given"""
+    if rarity is None and not name:
+        return None
+    return [
+        plant.id for plant in plants
+        if (rarity is None or plant.rarity == rarity) and (not name or name.lower() in plant.name.lower())
+    ]
+
+def pick_values(stacks, quantity=None, highest=False):
+    """Pick plants from {plant_id: Counter of values}, lowest (or highest) value first
+
+    Returns {plant_id: Counter of values} of at most quantity plants (every
+    plant if quantity is None)"""
+    if quantity is None:
+        return {plant_id: Counter(values) for plant_id, values in stacks.items()}
+
+    ranked = sorted(
+        ((value, plant_id, count) for plant_id, values in stacks.items() for value, count in values.items()),
+        reverse=highest
+    )
+    picked = {}
+    for value, plant_id, count in ranked:
+        if quantity <= 0:
+            break
+        taken = min(count, quantity)
+        picked.setdefault(plant_id, Counter())[value] += taken
+        quantity -= taken
+    return picked
+
+class PlantStack(db.Model):
+    """Every plant of one type a User holds, as a count and a packed histogram
+    of their values (one row per User per plant, however many are harvested)"""
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True) # Primary key resolves a User's stacks
+    plant_id = db.Column(db.Integer, db.ForeignKey('plant.id', ondelete='CASCADE'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+    histogram = db.Column(db.LargeBinary, nullable=False) # pack_values() of value --> count
+
+    # Relationships
+
+    # User
+    user = db.relationship('User', back_populates='plant_stacks')
+    # Plant
+    plant = db.relationship('Plant', back_populates='stacks')
+
+    def __init__(self, user_id, plant_id, values):
+        self.user_id = user_id
+        self.plant_id = plant_id
+        self.set_values(values)
+
+    def get_values(self):
+        """Get a Counter of value --> number of plants with it"""
+        return unpack_values(self.histogram)
+
+    def set_values(self, values):
+        self.count = sum(values.values())
+        self.histogram = pack_values(values)
+
+    @classmethod
+    def swap(cls, user_id, before, after):
+        """Save User's stacks that changed, each only if it still holds the
+        histogram it was read with (compare-and-swap, no lock is taken)
+
+        before is {plant_id: histogram} as read and after is {plant_id:
+        Counter of values}. New stacks are inserted unless a concurrent request
+        created them first, and emptied ones are deleted. Returns False, with
+        nothing saved, if another request changed any of the stacks first."""
+        changes = {}
+        for plant_id in after.keys() | before.keys():
+            values = +after.get(plant_id, Counter()) # Drop values with no plants left
+            new = pack_values(values) if values else None
+            if new != before.get(plant_id):
+                changes[plant_id] = (before.get(plant_id), new, values.total())
+
+        if not changes:
+            return True
+        with savepoint() as attempt:
+            if db.engine.dialect.update_returning and db.engine.dialect.delete_returning and upsert(cls) is not None:
+                # One statement per kind of change, returning the stacks it saved
+                saved = cls.swap_all(user_id, changes)
+            else:
+                saved = {plant_id for plant_id, change in changes.items() if cls.swap_one(user_id, plant_id, *change)}
+            if len(saved) != len(changes):
+                # Discard the stacks that were saved
+                attempt.rollback()
+                return False
+        return True
+
+    @classmethod
+    def swap_one(cls, user_id, plant_id, old, new, count):
+        """Replace one stack's histogram old with new (None for no stack),
+        returning whether it still held old"""
+        where = (cls.user_id == user_id, cls.plant_id == plant_id)
+        if old is None:
+            statement = upsert(cls)
+            row = {'user_id': user_id, 'plant_id': plant_id, 'count': count, 'histogram': new}
+            if statement is None:
+                statement = db.insert(cls).values(**row)
+            else:
+                statement = statement.values(**row).on_conflict_do_nothing()
+        elif new is None:
+            statement = db.delete(cls).where(*where, cls.histogram == old)
+        else:
+            statement = db.update(cls).where(*where, cls.histogram == old).values(count=count, histogram=new)
+        return db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount == 1
+
+    @classmethod
+    def swap_all(cls, user_id, changes):
+        """Apply swap_one()'s changes ({plant_id: (old, new, count)}) in at most
+        three statements (insert, update and delete), returning the plant IDs saved"""
+        inserts = {plant_id: change for plant_id, change in changes.items() if change[0] is None}
+        updates = {plant_id: change for plant_id, change in changes.items() if change[0] is not None and change[1] is not None}
+        deletes = {plant_id: change for plant_id, change in changes.items() if change[1] is None}
+        options = {'synchronize_session': False}
+        saved = set()
+
+        if inserts:
+            statement = upsert(cls)
+            saved.update(db.session.execute(statement.values([
+                {'user_id': user_id, 'plant_id': plant_id, 'count': count, 'histogram': new}
+                for plant_id, (_, new, count) in inserts.items()
+            ]).on_conflict_do_nothing().returning(cls.plant_id)).scalars())
+        if updates:
+            saved.update(db.session.execute(db.update(cls).where(
+                cls.user_id == user_id,
+                db.tuple_(cls.plant_id, cls.histogram).in_([(plant_id, old) for plant_id, (old, _, _) in updates.items()])
+            ).values(
+                count=db.case({plant_id: count for plant_id, (_, _, count) in updates.items()}, value=cls.plant_id),
+                histogram=db.case({plant_id: new for plant_id, (_, new, _) in updates.items()}, value=cls.plant_id)
+            ).returning(cls.plant_id), execution_options=options).scalars())
+        if deletes:
+            saved.update(db.session.execute(db.delete(cls).where(
+                cls.user_id == user_id,
+                db.tuple_(cls.plant_id, cls.histogram).in_([(plant_id, old) for plant_id, (old, _, _) in deletes.items()])
+            ).returning(cls.plant_id), execution_options=options).scalars())
+        return saved
+
+    @staticmethod
+    def format_entry(plant, value, count):
+        """Format an inventory entry for the plants of a type with a value"""
+        return {
+            'id': entry_id(plant.id, value),
+            'plant_id': plant.id,
+            'name': plant.name,
+            'value': value,
+            'count': count
+        }
+
+    @classmethod
+    def select_stacks(cls, user_id, plant_ids=None):
+        """Select User's stacks (of only plant_ids if given) in type order"""
+        statement = db.select(cls.plant_id, cls.histogram).where(cls.user_id == user_id).order_by(cls.plant_id)
+        if plant_ids is not None:
+            statement = statement.where(cls.plant_id.in_(plant_ids))
+        return statement
+
+    @classmethod
+    def get_page(cls, user_id, plant_ids=None, sort='type', descending=False, after=None, limit=50):
+        """Get a page of User's inventory entries (one per plant type and value)
+        and the cursor for the next page
+
+        User has at most one stack per plant type, so the matching stacks are
+        read and sorted in full, and only the page is formatted"""
+        plants = get_catalog().plants
+        sort_key = PLANT_SORTS[sort]
+        counts = {}
+        keys = []
+        for row in db.session.execute(cls.select_stacks(user_id, plant_ids)):
+            plant = plants[row.plant_id]
+            for value, count in unpack_values(row.histogram).items():
+                counts[plant.id, value] = count
+                keys.append(sort_key(plant, value) + (plant.id, value))
+
+        page, cursor = keyset_page(keys, after, limit, descending)
+        return [cls.format_entry(plants[key[-2]], key[-1], counts[key[-2:]]) for key in page], cursor
+
+    @classmethod
+    def stream_entries(cls, user_id, plant_ids=None):
+        """Yield User's inventory entries in type order, reading STREAM_BATCH
+        stacks at a time (through a server-side cursor on PostgreSQL)"""
+        plants = get_catalog().plants
+        rows = db.session.execute(cls.select_stacks(user_id, plant_ids).execution_options(yield_per=STREAM_BATCH))
+        for row in rows:
+            plant = plants[row.plant_id]
+            for value, count in sorted(unpack_values(row.histogram).items()):
+                yield cls.format_entry(plant, value, count)
+
+    def format_dict(self):
+        return {
+            'user_id': self.user_id,
+            'plant_id': self.plant_id,
+            'plant_name': self.plant.name,
+            'count': self.count,
+            'values': dict(sorted(self.get_values().items()))
+        }
@@ -43,8 +43,14 @@ class Room(db.Model):
     def is_full(self):
         return self.member_count() >= self.max_members
     
-    def format_dict(self):
-        """Format Room object to a dictionary for sending user data over HTTP/API endpoints"""
+    def format_dict(self, owner_name=None, member_count=None):
+        """Format Room object to a dictionary for sending user data over HTTP/API endpoints
+
+        owner_name, member_count -- already queried values (saves loading the owner and members)"""
+        if owner_name is None:
+            owner_name = self.owner.username
+        if member_count is None:
+            member_count = self.member_count()
         return {
             'id': self.id,
             'name': self.name,
@@ -53,7 +59,7 @@ class Room(db.Model):
             'join_code': self.join_code,
             'max_members': self.max_members,
             'owner_id': self.owner_id,
-            'owner_name': self.owner.username,
-            'member_count': self.member_count(),
-            'is_full': self.is_full()
+            'owner_name': owner_name,
+            'member_count': member_count,
+            'is_full': member_count >= self.max_members
         }
\ No newline at end of file
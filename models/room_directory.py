@@ -0,0 +1,66 @@
+from models.database import db
+from models.room import Room
+from sqlalchemy import func
+import time
+
+# How long a directory snapshot is served before it is rebuilt (seconds)
+# Other workers don't see this worker's invalidations, so keep it short
+SNAPSHOT_TTL = 5
+
+# Process-level directory snapshot: (time built, list of room dictionaries)
+_snapshot = None
+
+def build_directory():
+    """Get every room's directory listing in one query"""
+    from models.user import User
+
+    # Count members per room in a subquery instead of loading them
+    member_counts = db.session.query(
+        User.room_id,
+        func.count(User.id).label('member_count')
+    ).filter(User.room_id.isnot(None)).group_by(User.room_id).subquery()
+
+    owner = db.aliased(User)
+    rows = db.session.query(
+        Room.id,
+        Room.name,
+        Room.is_private,
+        Room.max_members,
+        owner.username.label('owner_name'),
+        func.coalesce(member_counts.c.member_count, 0).label('member_count')
+    ).join(
+        owner, owner.id == Room.owner_id
+    ).outerjoin(
+        member_counts, member_counts.c.room_id == Room.id
+    ).order_by(Room.id)
+
+    return [{
+        'id': row.id,
+        'name': row.name,
+        'is_private': row.is_private,
+        'member_count': row.member_count,
+        'max_members': row.max_members,
+        'is_full': row.member_count >= row.max_members,
+        'owner_name': row.owner_name
+    } for row in rows]
+
+def get_directory(query=''):
+    """Get room listings from the cached snapshot, optionally
+    filtered by a case-insensitive search on room name"""
+    global _snapshot
+
+    now = time.monotonic()
+    if _snapshot is None or now - _snapshot[0] > SNAPSHOT_TTL:
+        _snapshot = (now, build_directory())
+
+    rooms = _snapshot[1]
+    if query:
+        query = query.lower()
+        rooms = [room for room in rooms if query in room['name'].lower()]
+    return rooms
+
+def invalidate_directory():
+    """Drop the snapshot after a room is created,
+    deleted, joined or left"""
+    global _snapshot
+    _snapshot = None
@@ -1,5 +1,4 @@
 from models.database import db
-from random import choices
 
 class Seed(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -35,13 +34,9 @@ class Seed(db.Model):
     
     def generate_random_plant(self):
         """Generate a random plant from this seed's loot table"""
-        if not self.loot_table:
-            raise ValueError(f"Error: No plants found in '{self.name}' loot table")
-        
-        # Get plants and their respective weights from loot table
-        plants = [entry.plant for entry in self.loot_table]
-        weights = [entry.weight for entry in self.loot_table]
+        return self.generate_random_plants(k=1)[0]
 
-        # Select random plant from loot table
-        random_plant = choices(plants, weights=weights, k=1)[0]
-        return random_plant
\ No newline at end of file
+    def generate_random_plants(self, k=1):
+        """Generate k random plants (catalog records) from this seed's loot table"""
+        from models.catalog import get_catalog
+        return get_catalog().roll_plants(self.id, k)
@@ -1,4 +1,23 @@
 from models.database import db
+from models.catalog import get_catalog
+from models.pagination import keyset_page
+
+# Seeds read from the database at a time when streaming an inventory
+STREAM_BATCH = 100
+
+# Inventory page sort orders (name --> sort key for a seed and quantity)
+SEED_SORTS = {
+    'type': lambda seed, quantity: (),
+    'name': lambda seed, quantity: (seed.name.lower(),),
+    'quantity': lambda seed, quantity: (quantity,)
+}
+
+def filter_seeds(seeds, name=None):
+    """Get the IDs of the seeds with part of a name (case
+    insensitive), or None if no name is given"""
+    if not name:
+        return None
+    return [seed.id for seed in seeds if name.lower() in seed.name.lower()]
 
 class SeedInv(db.Model):
     __tablename__ = 'user_seed_inv' # Set a specific tablename instead of setting default
@@ -18,6 +37,46 @@ class SeedInv(db.Model):
         self.seed_id = seed_id
         self.quantity = quantity
     
+    @staticmethod
+    def format_entry(seed, quantity):
+        """Format an inventory entry for a seed"""
+        return {
+            'id': seed.id,
+            'name': seed.name,
+            'quantity': quantity
+        }
+
+    @classmethod
+    def select_entries(cls, user_id, seed_ids=None):
+        """Select User's seed entries (of only seed_ids if given) in type order"""
+        statement = db.select(cls.seed_id, cls.quantity).where(cls.user_id == user_id).order_by(cls.seed_id)
+        if seed_ids is not None:
+            statement = statement.where(cls.seed_id.in_(seed_ids))
+        return statement
+
+    @classmethod
+    def get_page(cls, user_id, seed_ids=None, sort='type', descending=False, after=None, limit=50):
+        """Get a page of User's seed inventory entries and the cursor for the next page"""
+        seeds = get_catalog().seeds
+        sort_key = SEED_SORTS[sort]
+        quantities = {}
+        keys = []
+        for row in db.session.execute(cls.select_entries(user_id, seed_ids)):
+            quantities[row.seed_id] = row.quantity
+            keys.append(sort_key(seeds[row.seed_id], row.quantity) + (row.seed_id,))
+
+        page, cursor = keyset_page(keys, after, limit, descending)
+        return [cls.format_entry(seeds[key[-1]], quantities[key[-1]]) for key in page], cursor
+
+    @classmethod
+    def stream_entries(cls, user_id, seed_ids=None):
+        """Yield User's seed inventory entries in type order, reading STREAM_BATCH
+        rows at a time (through a server-side cursor on PostgreSQL)"""
+        seeds = get_catalog().seeds
+        rows = db.session.execute(cls.select_entries(user_id, seed_ids).execution_options(yield_per=STREAM_BATCH))
+        for row in rows:
+            yield cls.format_entry(seeds[row.seed_id], row.quantity)
+
     def format_dict(self):
         return {
             'user_id': self.user_id,
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+
+# SQLite connection settings (selected by SQLITE_PROFILE)
+SQLITE_PROFILES = {
+    # SQLite's own defaults: rollback journal, fsync on every commit
+    'default': {},
+    # Single-node deployments
+    'tuned': {
+        'journal_mode': 'WAL', # Readers don't block the writer (or each other)
+        'synchronous': 'NORMAL', # Only fsync at checkpoints, safe with WAL
+        'busy_timeout': 5000, # Milliseconds to wait for another writer before "database is locked" (the wait blocks the worker)
+        'cache_size': -64000, # Page cache in KiB (64 MB)
+        'mmap_size': 268435456, # Read the file through a 256 MB memory map
+        'temp_store': 'MEMORY'
+    }
+}
+
+def tune_sqlite(engine, pragmas):
+    """Set PRAGMAs on every new connection of an SQLite engine
+
+    Must be called before the engine's first connection is made."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    return True
+
+def sqlite_settings(engine):
+    """Get the PRAGMA values an SQLite engine's connections are using"""
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in SQLITE_PROFILES['tuned']
+        }
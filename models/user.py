@@ -1,12 +1,14 @@
-from models.database import db
+from models.database import db, commit, upsert
 from models.growing_plant import GrowingPlant
 from models.seed_inv import SeedInv
-from models.plant_inv import PlantInv
+from models.plant_stack import PlantStack, unpack_values, pick_values, CHANGE_ATTEMPTS
 from models.room import Room
 import uuid
 from flask_login import UserMixin
+from sqlalchemy.orm.attributes import set_committed_value
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from collections import Counter
 import pytz
 
 class User(db.Model, UserMixin):
@@ -16,8 +18,9 @@ class User(db.Model, UserMixin):
     password_hash = db.Column(db.String(1024))
     date_registered = db.Column(db.DateTime, default=datetime.now(pytz.timezone('Australia/Sydney'))) # Save time of registration relative to Sydney's timezone
     currency = db.Column(db.Integer, default=100) # Set default currency to 100
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='SET NULL'), nullable=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id', ondelete='SET NULL'), nullable=True, index=True) # Indexed to resolve Room.members
     is_admin = db.Column(db.Boolean, default=False) # Deny new users administrative permissions
+    inventory_version = db.Column(db.Integer, default=0, server_default='0', nullable=False) # Changes whenever the inventory does (used for ETags)
 
     # Relationships
 
@@ -32,7 +35,7 @@ class User(db.Model, UserMixin):
     messages = db.relationship('ChatMessage', back_populates='user', cascade='all, delete-orphan')
     # Inventory
     seed_inventories = db.relationship('SeedInv', back_populates='user', cascade='all, delete-orphan')
-    plant_inventories = db.relationship('PlantInv', back_populates='user', cascade='all, delete-orphan')
+    plant_stacks = db.relationship('PlantStack', back_populates='user', cascade='all, delete-orphan')
     # Seeds through Seed inventory
     seeds = db.relationship('Seed', secondary='user_seed_inv', back_populates='users')
 
@@ -44,22 +47,119 @@ class User(db.Model, UserMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def bump_inventory(self):
+        """Mark User's inventory as changed"""
+        # Increment in SQL so concurrent requests can't lose a bump
+        self.inventory_version = User.inventory_version + 1
+
+    def change_currency(self, amount, *conditions):
+        """Add amount (negative to take) to User's balance in one UPDATE
+
+        The balance is never read first, so concurrent requests can't lose an
+        update. Returns the new balance, or None if a condition wasn't met."""
+        statement = db.update(User).where(User.id == self.id, *conditions).values(currency=User.currency + amount)
+        options = {'synchronize_session': False}
+
+        if db.engine.dialect.update_returning:
+            balance = db.session.execute(statement.returning(User.currency), execution_options=options).scalar()
+        elif db.session.execute(statement, execution_options=options).rowcount:
+            balance = db.session.query(User.currency).filter(User.id == self.id).scalar()
+        else:
+            balance = None
+
+        if balance is not None:
+            # Already saved, so don't write it again on flush
+            set_committed_value(self, 'currency', balance)
+        return balance
+
+    def spend(self, amount):
+        """Take amount from User's balance only if they can afford it
+
+        Returns the new balance, or None if they can't afford it"""
+        return self.change_currency(-amount, User.currency >= amount)
+
+    def earn(self, amount):
+        """Add amount to User's balance, returning the new balance"""
+        return self.change_currency(amount)
+
+    def change_plants(self, change, plant_ids=None):
+        """Read User's plant stacks, let change() edit them and save the ones it changed
+
+        change gets {plant_id: Counter of values} for the stacks in plant_ids
+        (every stack if None) that User has, and edits it in place. No lock is
+        taken: stacks are only saved if they still hold what was read, and if
+        a concurrent request changed one first, they are read again and
+        change() runs again (so it must only depend on the stacks it gets)."""
+        query = db.session.query(PlantStack.plant_id, PlantStack.histogram).filter(PlantStack.user_id == self.id)
+        if plant_ids is not None:
+            query = query.filter(PlantStack.plant_id.in_(list(plant_ids)))
+
+        for _ in range(CHANGE_ATTEMPTS):
+            before = {row.plant_id: row.histogram for row in query}
+            stacks = {plant_id: unpack_values(histogram) for plant_id, histogram in before.items()}
+            change(stacks)
+            if PlantStack.swap(self.id, before, stacks):
+                self.bump_inventory()
+                return
+        raise RuntimeError("Your inventory is busy, please try again!")
+
+    def add_plants(self, values):
+        """Add plants to User's inventory from {plant_id: Counter of values}"""
+        def add(stacks):
+            for plant_id, plant_values in values.items():
+                stacks.setdefault(plant_id, Counter()).update(plant_values)
+        self.change_plants(add, values.keys())
+
     def add_plant(self, plant, value=None):
         """Add a plant to User's inventory"""
-        inv_entry = PlantInv(
-            user_id=self.id,
-            plant_id=plant.id,
-            value=value if value is not None else 0
-        )
-        db.session.add(inv_entry)
+        self.add_plants({plant.id: Counter([value if value is not None else 0])})
+
+    def take_plants(self, choose, plant_ids=None):
+        """Remove the plants choose() picks from User's inventory
+
+        choose gets {plant_id: Counter of values} for the stacks in plant_ids
+        (every stack if None) and returns {plant_id: Counter of values} to take.
+        Returns the plants taken - stacks are only saved if unchanged since
+        they were read, so plants a concurrent request took first can't be
+        taken twice"""
+        taken = {}
+
+        def take(stacks):
+            taken.clear() # Stacks were read again after a concurrent change
+            for plant_id, values in choose(stacks).items():
+                # Only what User has can be taken
+                values &= stacks.get(plant_id, Counter())
+                if values:
+                    taken[plant_id] = values
+                    stacks[plant_id] -= values
+        self.change_plants(take, plant_ids)
+        return taken
 
-    def remove_plant(self, plant_entry):
-        """Remove a plant from User's inventory"""
-        if plant_entry in self.plant_inventories:
-            db.session.delete(plant_entry)
+    def take_plant(self, plant_id, value=None, highest=False):
+        """Remove one plant of a type from User's inventory - one with the
+        given value, or else the lowest (or highest) valued one
+
+        Returns the value of the plant taken, or None if User doesn't have it"""
+        def choose(stacks):
+            if value is None:
+                return pick_values(stacks, 1, highest)
+            return {plant_id: Counter([value])}
+
+        taken = self.take_plants(choose, [plant_id])
+        return next(iter(taken[plant_id])) if taken else None
 
     def add_seed(self, seed, quantity=1):
         """Add a seed to User's inventory"""
+        statement = upsert(SeedInv)
+        if statement is not None:
+            # Create the entry or add to it in one statement, so concurrent adds can't lose a quantity
+            db.session.execute(statement.values(user_id=self.id, seed_id=seed.id, quantity=quantity).on_conflict_do_update(
+                index_elements=[SeedInv.user_id, SeedInv.seed_id],
+                set_={'quantity': SeedInv.quantity + quantity}
+            ))
+            self.bump_inventory()
+            return
+
         # Check for existing inventory entry
         inv_entry = SeedInv.query.filter_by(user_id=self.id, seed_id=seed.id).first()
 
@@ -70,22 +170,20 @@ class User(db.Model, UserMixin):
             # Create a new inventory entry
             inv_entry = SeedInv(self.id, seed.id, quantity)
             db.session.add(inv_entry)
-            if seed not in self.seeds:
-                self.seeds.append(seed)
+        self.bump_inventory()
     
     def remove_seed(self, seed):
         """Remove a seed from User's inventory"""
-        if seed in self.seeds:
-            inv_entry = SeedInv.query.filter_by(
-                user_id=self.id,
-                seed_id=seed.id
-            ).first()
-            if inv_entry:
-                inv_entry.quantity -= 1
-                if inv_entry.quantity <= 0:
-                    self.seeds.remove(seed)
-                    db.session.delete(inv_entry)
-                return True
+        inv_entry = SeedInv.query.filter_by(
+            user_id=self.id,
+            seed_id=seed.id
+        ).first()
+        if inv_entry:
+            inv_entry.quantity -= 1
+            if inv_entry.quantity <= 0:
+                db.session.delete(inv_entry)
+            self.bump_inventory()
+            return True
         return False
 
 
@@ -94,7 +192,7 @@ class User(db.Model, UserMixin):
 
         seed = GrowingPlant(user_id=self.id, seed_id=seed_id)
         db.session.add(seed)
-        db.session.commit()
+        commit()
         return seed
     
     def get_growing_plants(self):
@@ -123,7 +221,7 @@ class User(db.Model, UserMixin):
                 elif not room.members:
                     db.session.delete(room)
 
-            db.session.commit()
+            commit()
     
     def format_dict(self):
         """Format User object to a dictionary for sending user data over HTTP/API endpoints"""
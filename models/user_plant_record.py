@@ -1,4 +1,4 @@
-from models.database import db
+from models.database import db, commit, upsert
 from datetime import datetime
 import pytz
 
@@ -10,6 +10,13 @@ class UserPlantRecord(db.Model):
     first_discovered = db.Column(db.DateTime)
     last_grown = db.Column(db.DateTime)
 
+    # Indexes
+
+    __table_args__ = (
+        # One record per User per plant (init_record and record_many rely on this)
+        db.Index('uq_user_plant_record_user_plant', 'user_id', 'plant_id', unique=True),
+    )
+
     # Relationships
 
     # User
@@ -27,7 +34,7 @@ class UserPlantRecord(db.Model):
         user has grown an arbitrary plant"""
         self.times_grown += 1
         self.last_grown = datetime.now(pytz.timezone('Australia/Sydney'))
-        db.session.commit()
+        commit()
 
     @classmethod
     def init_record(cls, user_id, plant_id):
@@ -36,6 +43,52 @@ class UserPlantRecord(db.Model):
         if not record:
             record = cls(user_id, plant_id)
             db.session.add(record)
-            db.session.commit()
+            commit()
         return record
 
+
+    @classmethod
+    def record_many(cls, user_id, counts):
+        """Record several harvests at once from a
+        dictionary of plant ID --> times grown"""
+        if not counts:
+            return
+        
+        now = datetime.now(pytz.timezone('Australia/Sydney'))
+
+        statement = upsert(cls)
+        if statement is not None:
+            # Create the records or add to them in one statement, so concurrent
+            # harvests can't collide on a new record or lose a count
+            rows = [
+                {'user_id': user_id, 'plant_id': plant_id, 'times_grown': count, 'first_discovered': now, 'last_grown': now}
+                for plant_id, count in sorted(counts.items())
+            ]
+            statement = statement.values(rows)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[cls.user_id, cls.plant_id],
+                set_={
+                    'times_grown': cls.times_grown + statement.excluded.times_grown,
+                    'last_grown': statement.excluded.last_grown
+                }
+            ))
+            return
+
+        # Get all existing records for these plants in one query
+        records = {
+            record.plant_id: record for record in cls.query.filter(
+                cls.user_id == user_id,
+                cls.plant_id.in_(counts.keys())
+            )
+        }
+
+        for plant_id, count in counts.items():
+            record = records.get(plant_id)
+            if not record:
+                record = cls(user_id, plant_id)
+                record.times_grown = 0
+                record.first_discovered = now
+                db.session.add(record)
+                records[plant_id] = record
+            record.times_grown += count
+            record.last_grown = now
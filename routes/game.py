@@ -1,69 +1,214 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, make_response, stream_with_context
 from flask_login import login_required, current_user
-from models.database import db
-from models.seed import Seed
+from models.database import db, unit_of_work
+from models.catalog import get_catalog
 from models.growing_plant import GrowingPlant
 from models.user_plant_record import UserPlantRecord
-from models.plant_inv import PlantInv
-from models.seed_inv import SeedInv
+from models.plant import RARITIES
+from models.plant_stack import PlantStack, PLANT_SORTS, entry_id, split_entry_id, unpack_values, pick_values, filter_plants
+from models.seed_inv import SeedInv, SEED_SORTS, filter_seeds
+from models.db_pool import pool_stats
+from models.green_db import green_db_status
+from sockets.notify import notify_inventory_changed
+from sockets.growth_scheduler import scheduler, ready_timestamp
 from datetime import datetime, timezone
+from collections import Counter
+import json
 
 game = Blueprint('game', __name__)
 
+# Most plants that can be picked by ID in one bulk sell
+MAX_BULK_SELL = 1000
+
+# Orders plants can be sold in when not picked by ID
+PICKS = ('lowest', 'highest')
+
+# Inventory page sizes (entries)
+INVENTORY_PAGE_SIZE = 50
+MAX_INVENTORY_PAGE = 200
+
+def is_int(value):
+    """Check a JSON value is an integer (JSON true/false load as bools, which are ints)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def seed_entry(seed):
+    """Get User's current inventory entry for a seed (quantity 0 if none left)"""
+    inv_entry = SeedInv.query.filter_by(user_id=current_user.id, seed_id=seed.id).first()
+    return SeedInv.format_entry(seed, inv_entry.quantity if inv_entry else 0)
+
+def plant_entries(plant_id, values):
+    """Get User's inventory entries for plants of a type from a Counter of
+    values (one entry per value, with the number of plants that have it)"""
+    plant = get_catalog().plants[plant_id]
+    return [PlantStack.format_entry(plant, value, count) for value, count in sorted(values.items())]
+
+def inventory_etag():
+    """Get the ETag of User's inventory (changes whenever the inventory does)"""
+    return f'{current_user.id}-{current_user.inventory_version}'
+
+def not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    return response
+
+def revalidate(response, etag):
+    """Make clients revalidate with If-None-Match on every poll"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def page_args(sorts):
+    """Get sort, order, after and limit from the query string, raises ValueError if invalid"""
+    sort = request.args.get('sort', 'type')
+    if sort not in sorts:
+        raise ValueError("Invalid sort!")
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("Invalid order!")
+    return {
+        'sort': sort,
+        'descending': order == 'desc',
+        'after': request.args.get('after'),
+        'limit': min(max(request.args.get('limit', INVENTORY_PAGE_SIZE, type=int), 1), MAX_INVENTORY_PAGE)
+    }
+
+def ndjson_response(entries, version):
+    """Stream entries as newline delimited JSON (one entry per line) while
+    they are read, so the inventory is never held in memory in full.
+    The last line is {"done": true, "version": ..., "count": ...}, a stream
+    without it was cut short"""
+    def lines():
+        count = 0
+        for entry in entries:
+            count += 1
+            yield json.dumps(entry, separators=(',', ':')) + '\n'
+        yield json.dumps({'done': True, 'version': version, 'count': count}, separators=(',', ':')) + '\n'
+
+    response = Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+    response.headers['X-Inventory-Version'] = str(version)
+    response.cache_control.private = True
+    response.cache_control.no_store = True
+    return response
+
+def inventory_page(name, get_page, stream_entries, ids, sorts):
+    """Respond with a page of User's inventory, or all of it streamed as NDJSON (format=ndjson)"""
+    if request.args.get('format') == 'ndjson':
+        # Streams are read in the order they are stored
+        if request.args.get('sort', 'type') != 'type' or request.args.get('order', 'asc') != 'asc':
+            return jsonify({'success': False, 'message': "Streamed inventories can only be sorted by type!"}), 400
+        return ndjson_response(stream_entries(current_user.id, ids), current_user.inventory_version)
+
+    etag = inventory_etag()
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    try:
+        entries, cursor = get_page(current_user.id, ids, **page_args(sorts))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return revalidate(jsonify({
+        'success': True,
+        name: entries,
+        'next_cursor': cursor,
+        'version': current_user.inventory_version
+    }), etag)
+
 @game.route('/api/inventory', methods=['GET'])
 @login_required
+@unit_of_work
 def get_inv():
     """Get the all items in the User's inventory (seeds and plants)"""
+    # Inventory is unchanged since the client last fetched it
+    etag = inventory_etag()
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    # Names come from the catalog, so no joins are needed
+    catalog = get_catalog()
+
     # Get User's seeds with quantities
-    seed_inv = []
-    for seed in current_user.seeds:
-        inv_entry = SeedInv.query.filter_by(
-            user_id=current_user.id,
-            seed_id=seed.id
-        ).first()
-        if inv_entry:
-            seed_inv.append({
-                'id': seed.id,
-                'name': seed.name,
-                'quantity': inv_entry.quantity
-            })
+    seed_rows = db.session.query(SeedInv.seed_id, SeedInv.quantity).filter(
+        SeedInv.user_id == current_user.id
+    ).order_by(SeedInv.seed_id)
 
-    # Get User's plants
-    plant_inv = [{
-        'id': inv_entry.id,
-        'plant_id': inv_entry.plant_id,
-        'name': inv_entry.plant.name,
-        'value': inv_entry.value
-    } for inv_entry in current_user.plant_inventories]
+    seed_inv = [SeedInv.format_entry(catalog.seeds[row.seed_id], row.quantity) for row in seed_rows]
 
-    return jsonify({
+    # Get User's plants (one row per plant type, one entry per value). Entries
+    # are grouped by (plant type, value) with a count of the plants they stand
+    # for - clients used to get one entry per plant, so count plants by count
+    stack_rows = db.session.query(PlantStack.plant_id, PlantStack.histogram).filter(
+        PlantStack.user_id == current_user.id
+    ).order_by(PlantStack.plant_id)
+
+    plant_inv = [
+        entry for row in stack_rows for entry in plant_entries(row.plant_id, unpack_values(row.histogram))
+    ]
+
+    return revalidate(jsonify({
         'seeds': seed_inv,
         'plants': plant_inv
-    })
+    }), etag)
+
+@game.route('/api/inventory/plants', methods=['GET'])
+@login_required
+@unit_of_work
+def get_plant_page():
+    """Get a page of User's plants (one entry per plant type and value)
+
+    Query string: sort (type, name, value or rarity), order (asc or desc),
+    rarity, name (part of a plant's name), after (the last page's
+    next_cursor) and limit. format=ndjson streams every plant instead."""
+    rarity = request.args.get('rarity')
+    if rarity is not None and rarity not in RARITIES:
+        return jsonify({'success': False, 'message': "Invalid rarity!"}), 400
+    plant_ids = filter_plants(get_catalog().plants.values(), rarity, request.args.get('name'))
+    return inventory_page('plants', PlantStack.get_page, PlantStack.stream_entries, plant_ids, PLANT_SORTS)
+
+@game.route('/api/inventory/seeds', methods=['GET'])
+@login_required
+@unit_of_work
+def get_seed_page():
+    """Get a page of User's seeds
+
+    Query string: sort (type, name or quantity), order (asc or desc), name
+    (part of a seed's name), after (the last page's next_cursor) and limit.
+    format=ndjson streams every seed instead."""
+    seed_ids = filter_seeds(get_catalog().seeds.values(), request.args.get('name'))
+    return inventory_page('seeds', SeedInv.get_page, SeedInv.stream_entries, seed_ids, SEED_SORTS)
 
 @game.route('/api/plants/growing', methods=['GET'])
 @login_required
+@unit_of_work
 def get_growing():
     """Get all of User's growing plants"""
     if not current_user.room_id:
         return jsonify([])
     
-    growing = GrowingPlant.query.filter_by(
-        user_id=current_user.id,
-    ).all()
+    # Index range scan on (user_id, ready_at), soonest ready first
+    growing = db.session.query(
+        GrowingPlant.id,
+        GrowingPlant.seed_id,
+        GrowingPlant.growth_time,
+        GrowingPlant.ready_at
+    ).filter(
+        GrowingPlant.user_id == current_user.id
+    ).order_by(GrowingPlant.ready_at)
 
     now = datetime.now(timezone.utc)
+    seeds = get_catalog().seeds
     plants = []
 
     for plant in growing:
-        planted_at = plant.planted_at
-        if not planted_at.tzinfo:
-            planted_at = planted_at.replace(tzinfo=timezone.utc)
+        ready_at = plant.ready_at
+        if not ready_at.tzinfo:
+            ready_at = ready_at.replace(tzinfo=timezone.utc)
 
-        elapsed = (now - planted_at).total_seconds()
+        elapsed = plant.growth_time - (ready_at - now).total_seconds()
         plants.append({
             'id': plant.id,
-            'name': plant.seed.name,
+            'name': seeds[plant.seed_id].name,
             'growth_time': plant.growth_time,
             'elapsed_time': elapsed
         })
@@ -72,6 +217,7 @@ def get_growing():
 
 @game.route('/api/plants/plant-seed', methods=['POST'])
 @login_required
+@unit_of_work
 def plant_seed():
     """Plant and start growing User's selected seed"""
     if not current_user.room_id:
@@ -81,23 +227,26 @@ def plant_seed():
     if not seed_id:
         return jsonify({'success': False, 'message': "No seed selected"})
     
-    # Check if User has the seed
-    seed = Seed.query.get(seed_id)
-    if not seed or seed not in current_user.seeds:
+    seed = get_catalog().seeds.get(seed_id) if is_int(seed_id) else None
+    if not seed:
+        return jsonify({'success': False, 'message': "Seed does not exist!"})
+
+    # Consume planted seed (fails if User doesn't have the seed)
+    if not current_user.remove_seed(seed):
         return jsonify({'success': False, 'message': f"You do not have any {seed.name}s!"})
-    
+
     grow = GrowingPlant(
         user_id=current_user.id,
         seed_id=seed.id
     )
-
-    # Consume planted seed
-    if not current_user.remove_seed(seed):
-        return jsonify({'success': False, 'message': f"You do not have any {seed.name}s!"})
     
     db.session.add(grow)
     db.session.commit()
 
+    # Push the seed change now and a plant_ready event once it has grown
+    notify_inventory_changed(current_user, seeds=[seed_entry(seed)])
+    scheduler.schedule(grow.id, current_user.id, ready_timestamp(grow.ready_at))
+
     return jsonify({
         'success': True,
         'message': f"Planted {seed.name}",
@@ -106,6 +255,7 @@ def plant_seed():
 
 @game.route('/api/plants/<int:plant_id>/harvest', methods=['POST'])
 @login_required
+@unit_of_work
 def harvest(plant_id):
     """Harvest a User's fully grown plant"""
     plant = GrowingPlant.query.get_or_404(plant_id)
@@ -118,20 +268,27 @@ def harvest(plant_id):
     if not plant.is_harvestable():
         return jsonify({'success': False, 'message': "This plant is not ready to be harvested!"})
     
-    # Select random plant and value from seed loot table
     try:
+        # Remove seed from growing plants first, only the request that deletes it can harvest it
+        deleted = db.session.execute(
+            db.delete(GrowingPlant).where(GrowingPlant.id == plant.id),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if not deleted:
+            return jsonify({'success': False, 'message': "This plant has already been harvested!"})
+
+        # Select random plant and value from seed loot table
         ran_plant, value = plant.harvest()
 
         # Add plant to User's inventory
         current_user.add_plant(ran_plant, value)
 
         # Update User's plant record
-        record = UserPlantRecord.init_record(current_user.id, ran_plant.id)
-        record.record()
-
-        # Remove seed from growing plants
-        db.session.delete(plant)
+        UserPlantRecord.record_many(current_user.id, {ran_plant.id: 1})
         db.session.commit()
+        scheduler.cancel([plant_id])
+
+        notify_inventory_changed(current_user, plants_added=plant_entries(ran_plant.id, Counter([value])))
 
         return jsonify({
             'success': True,
@@ -146,8 +303,102 @@ def harvest(plant_id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
+@game.route('/api/plants/harvest-all', methods=['POST'])
+@login_required
+@unit_of_work
+def harvest_all():
+    """Harvest all of User's fully grown plants in one transaction"""
+    # Remove all of User's fully grown plants (index range scan) before rolling
+    # any loot, and harvest only the rows this request deleted - a concurrent
+    # harvest can't collect the same plants again
+    ready_filter = (GrowingPlant.user_id == current_user.id, GrowingPlant.ready_filter())
+    options = {'synchronize_session': False}
+    if db.engine.dialect.delete_returning:
+        ready = db.session.execute(
+            db.delete(GrowingPlant).where(*ready_filter).returning(GrowingPlant.id, GrowingPlant.seed_id),
+            execution_options=options
+        ).all()
+    else:
+        ready = db.session.query(GrowingPlant.id, GrowingPlant.seed_id).filter(*ready_filter).all()
+        deleted = db.session.execute(
+            db.delete(GrowingPlant).where(GrowingPlant.id.in_([plant.id for plant in ready])),
+            execution_options=options
+        ).rowcount
+        if deleted != len(ready):
+            db.session.rollback()
+            return jsonify({'success': False, 'message': "Your plants are already being harvested!"})
+    ready_ids = [plant.id for plant in ready]
+
+    if not ready:
+        return jsonify({'success': False, 'message': "You have no plants ready to harvest!"})
+
+    try:
+        # Group ready plants by seed so each loot table is sampled in one batch
+        catalog = get_catalog()
+        seed_counts = Counter(plant.seed_id for plant in ready)
+        plant_ids = []
+        for seed_id, count in seed_counts.items():
+            plant_ids.extend(plant.id for plant in catalog.roll_plants(seed_id, count))
+        plants = catalog.plants
+
+        # Add the harvested plants to User's stacks (one row per plant type)
+        added = {}
+        summary = {}
+        for plant_id in plant_ids:
+            plant = plants[plant_id]
+            value = plant.roll_value()
+            added.setdefault(plant_id, Counter())[value] += 1
+
+            entry = summary.setdefault(plant_id, {
+                'id': plant_id,
+                'name': plant.name,
+                'rarity': plant.rarity,
+                'count': 0,
+                'total_value': 0
+            })
+            entry['count'] += 1
+            entry['total_value'] += value
+        current_user.add_plants(added)
+
+        # Update User's plant records
+        UserPlantRecord.record_many(current_user.id, Counter(plant_ids))
+        db.session.commit()
+        scheduler.cancel(ready_ids)
+
+        notify_inventory_changed(current_user, plants_added=[
+            entry for plant_id, values in sorted(added.items()) for entry in plant_entries(plant_id, values)
+        ])
+
+        return jsonify({
+            'success': True,
+            'message': f'You collected {len(plant_ids)} plant(s)!',
+            'harvested': ready_ids,
+            'plants': list(summary.values()),
+            'total_value': sum(entry['total_value'] for entry in summary.values())
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@game.route('/api/scheduler/stats', methods=['GET'])
+@login_required
+def get_scheduler_stats():
+    """Get growth scheduler statistics (admin only)"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': "You do not have permission to view this!"}), 403
+    return jsonify(scheduler.stats())
+
+@game.route('/api/db/stats', methods=['GET'])
+@login_required
+def get_db_stats():
+    """Get database connection pool and driver statistics (admin only)"""
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': "You do not have permission to view this!"}), 403
+    return jsonify(pool_stats(db.engine) | green_db_status(db.engine))
+
 @game.route('/api/user/balance', methods=['GET'])
 @login_required
+@unit_of_work
 def get_balanced():
     """Get User's current balance"""
     return jsonify({
@@ -156,10 +407,11 @@ def get_balanced():
 
 @game.route('/api/shop/items', methods=['GET'])
 @login_required
+@unit_of_work
 def get_shop_items():
     """Get all items sold in the shop"""
     try:
-        seeds = Seed.query.all()
+        seeds = get_catalog().seeds.values()
         return jsonify([
             {
                 'id': seed.id,
@@ -172,9 +424,12 @@ def get_shop_items():
     
 @game.route('/api/shop/items/<int:seed_id>')
 @login_required
+@unit_of_work
 def get_selected_item(seed_id):
     """Get data for selected shop item"""
-    seed = Seed.query.filter_by(id=seed_id).first()
+    seed = get_catalog().seeds.get(seed_id)
+    if not seed:
+        return jsonify({'success': False, 'message': "Seed does not exist!"}), 404
     return jsonify({
         'id': seed.id,
         'name': seed.name,
@@ -183,6 +438,7 @@ def get_selected_item(seed_id):
 
 @game.route('/api/shop/buy', methods=['POST'])
 @login_required
+@unit_of_work
 def buy_items():
     """Buy selected item from the shop"""
     seed_id = request.json.get('seed_id')
@@ -191,57 +447,171 @@ def buy_items():
     if not seed_id:
         return jsonify({'success': False, 'message': "No seed selected!"})
     
-    seed = Seed.query.get(seed_id)
+    seed = get_catalog().seeds.get(seed_id) if is_int(seed_id) else None
     if not seed:
         return jsonify({'success': False, 'message': "Seed does not exist!"})
     
-    # Check User can afford purchase
+    if not is_int(quantity) or quantity < 1:
+        return jsonify({'success': False, 'message': "Invalid quantity!"})
+
+    # Take payment only if User can afford it (one conditional UPDATE, no row lock held beforehand)
     total_cost = seed.cost * quantity
-    if current_user.currency < total_cost:
+    balance = current_user.spend(total_cost)
+    if balance is None:
         return jsonify({'success': False, 'message': f"You cannot afford x{quantity} {seed.name}(s)!"})
     
     # Add purchased items to inventory
     current_user.add_seed(seed, quantity=quantity)
-
-    # Change User's balance
-    current_user.currency -= total_cost
     db.session.commit()
 
+    notify_inventory_changed(current_user, seeds=[seed_entry(seed)])
+
     return jsonify({
         'success': True ,
         'message': f"You bought x{quantity} {seed.name}(s)!",
-        'balance': current_user.currency
+        'balance': balance
     })
 
 @game.route('/api/shop/sell', methods=['POST'])
 @login_required
+@unit_of_work
 def sell_item():
-    """Sell a selected item from User's inventory"""
-    inv_entry_id = request.json.get('inv_entry_id')
-    if not inv_entry_id:
+    """Sell a selected item from User's inventory
+
+    Selects the plant by inv_entry_id (plant type and value), or by plant_id
+    and pick ('lowest' or 'highest' value)"""
+    data = request.json or {}
+    inv_entry_id = data.get('inv_entry_id')
+    plant_id = data.get('plant_id')
+    pick = data.get('pick')
+
+    if inv_entry_id:
+        if not is_int(inv_entry_id):
+            return jsonify({'success': False, 'message': "You do not have this plant!"})
+        plant_id, value = split_entry_id(inv_entry_id)
+    elif plant_id and pick in PICKS:
+        if not is_int(plant_id):
+            return jsonify({'success': False, 'message': "You do not have this plant!"})
+        value = None
+    else:
         return jsonify({'success': False, 'message': "No plant selected!"})
+
+    sold = get_catalog().plants.get(plant_id)
+    if not sold:
+        return jsonify({'success': False, 'message': "You do not have this plant!"})
     
     try:
-        # Find the specific plant in User's inventory
-        plant = PlantInv.query.options(db.joinedload(PlantInv.plant)).filter_by(
-            id=inv_entry_id,
-            user_id=current_user.id
-        ).first()
-
-        if not plant:
+        # Remove the plant from User's inventory, only one request can sell it
+        value = current_user.take_plant(plant_id, value, highest=pick == 'highest')
+        if value is None:
             return jsonify({'success': False, 'message': "You do not have this plant!"})
         
         # Add plant value to balance
-        current_user.currency += plant.value
-        # Remove plant from User's inventory
-        current_user.remove_plant(plant)
+        balance = current_user.earn(value)
         db.session.commit()
 
+        notify_inventory_changed(current_user, plants_removed=[entry_id(plant_id, value)])
+
+        return jsonify({
+            'success': True,
+            'message': f"You sold {sold.name} [{sold.rarity}] for ${value}!",
+            'balance': balance
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@game.route('/api/shop/sell-bulk', methods=['POST'])
+@login_required
+@unit_of_work
+def sell_bulk():
+    """Sell many plants from User's inventory in one transaction
+
+    Selects plants by any of: inv_entry_ids (list of IDs, an ID listed twice
+    sells two), plant_id, rarity, or all (true) - several are combined. At
+    most quantity of them are sold if given, picking the 'lowest' (default)
+    or 'highest' valued first"""
+    data = request.json or {}
+    catalog = get_catalog()
+    plant_ids = None # Plant types to sell from (None for every type)
+    wanted = None # (plant_id, value) --> number to sell
+
+    inv_entry_ids = data.get('inv_entry_ids')
+    if inv_entry_ids is not None:
+        if not isinstance(inv_entry_ids, list) or not all(is_int(i) for i in inv_entry_ids):
+            return jsonify({'success': False, 'message': "Invalid plant selection!"}), 400
+        if len(inv_entry_ids) > MAX_BULK_SELL:
+            return jsonify({'success': False, 'message': f"You can only sell {MAX_BULK_SELL} selected plants at once!"}), 400
+        wanted = Counter(split_entry_id(i) for i in inv_entry_ids)
+        plant_ids = {selected for selected, _ in wanted}
+
+    plant_id = data.get('plant_id')
+    if plant_id is not None:
+        if not is_int(plant_id) or plant_id not in catalog.plants:
+            return jsonify({'success': False, 'message': "Plant does not exist!"}), 400
+        plant_ids = {plant_id} if plant_ids is None else plant_ids & {plant_id}
+
+    rarity = data.get('rarity')
+    if rarity is not None:
+        # Rarity is looked up in the catalog, so no join is needed
+        rarity_ids = {plant.id for plant in catalog.plants.values() if plant.rarity == rarity}
+        if not rarity_ids:
+            return jsonify({'success': False, 'message': "Invalid rarity!"}), 400
+        plant_ids = rarity_ids if plant_ids is None else plant_ids & rarity_ids
+
+    quantity = data.get('quantity')
+    if quantity is not None and (not is_int(quantity) or quantity < 1):
+        return jsonify({'success': False, 'message': "Invalid quantity!"}), 400
+
+    pick = data.get('pick', 'lowest')
+    if pick not in PICKS:
+        return jsonify({'success': False, 'message': "Invalid pick!"}), 400
+
+    if plant_ids is None and data.get('all') is not True:
+        return jsonify({'success': False, 'message': "No plants selected!"})
+
+    def choose(stacks):
+        if wanted is not None:
+            # Only the plants picked by ID
+            selected = {}
+            for (stack_id, value), count in wanted.items():
+                if stack_id in stacks:
+                    selected.setdefault(stack_id, Counter())[value] = count
+            stacks = {stack_id: values & stacks[stack_id] for stack_id, values in selected.items()}
+        return pick_values(stacks, quantity, highest=pick == 'highest')
+
+    try:
+        # Remove every matching plant and credit their total in one UPDATE
+        removed = current_user.take_plants(choose, plant_ids)
+        if not removed:
+            return jsonify({'success': False, 'message': "You have no plants to sell!"})
+
+        # Count sold plants by type
+        summary = []
+        for sold_id, values in sorted(removed.items()):
+            plant = catalog.plants[sold_id]
+            summary.append({
+                'id': plant.id,
+                'name': plant.name,
+                'rarity': plant.rarity,
+                'count': values.total(),
+                'total_value': sum(value * count for value, count in values.items())
+            })
+        total_value = sum(entry['total_value'] for entry in summary)
+        balance = current_user.earn(total_value)
+        db.session.commit()
+
+        notify_inventory_changed(current_user, plants_removed=[
+            entry_id(sold_id, value) for sold_id, values in sorted(removed.items()) for value in sorted(values.elements())
+        ])
+
         return jsonify({
             'success': True,
-            'message': f"You sold {plant.plant.name} [{plant.plant.rarity}] for ${plant.value}!",
-            'balance': current_user.currency
+            'message': f"You sold {sum(entry['count'] for entry in summary)} plant(s) for ${total_value}!",
+            'sold': summary,
+            'total_value': total_value,
+            'balance': balance
         })
     except Exception as e:
         db.session.rollback()
-        return jsonify({'success': False, 'message': str(e)})
\ No newline at end of file
+        return jsonify({'success': False, 'message': str(e)})
@@ -0,0 +1,42 @@
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_login import current_user
+from models.database import db
+from models.db_pool import pool_stats
+from models.metrics import Counter, Gauge, render
+from sockets.presence import presence
+from sockets.growth_scheduler import scheduler
+from sockets.chat_buffer import chat_buffer
+import hmac
+
+metrics = Blueprint('metrics', __name__)
+
+# Read when scraped, so nothing is kept up to date between scrapes
+
+def collect_pool():
+    stats = pool_stats(db.engine)
+    return {(state,): stats[state] for state in ('in_use', 'idle') if state in stats}
+
+Gauge('seedlings_db_connections', "Database connections in the pool by state", ('state',), collect=collect_pool)
+Counter('seedlings_db_pool_checkouts_total', "Database connections checked out",
+        collect=lambda: {(): pool_stats(db.engine).get('checkouts', 0)})
+Counter('seedlings_db_pool_wait_seconds_total', "Time spent waiting for a database connection",
+        collect=lambda: {(): pool_stats(db.engine).get('total_wait', 0.0)})
+Gauge('seedlings_rooms_active', "Rooms with a connected member", collect=lambda: {(): presence.stats()['rooms']})
+Gauge('seedlings_room_members', "Members connected to a room", collect=lambda: {(): presence.stats()['members']})
+Gauge('seedlings_growing_plants_pending', "Plants waiting to be marked ready", collect=lambda: {(): scheduler.stats()['pending']})
+Gauge('seedlings_chat_messages_pending', "Chat messages waiting to be saved", collect=lambda: {(): chat_buffer.stats()['pending']})
+
+def authorised():
+    """Allow the scrape token (Authorization: Bearer ...) or a logged in admin"""
+    token = current_app.config['METRICS_TOKEN']
+    auth = request.headers.get('Authorization', '')
+    if token and auth.startswith('Bearer '):
+        return hmac.compare_digest(auth[len('Bearer '):].encode(), token.encode())
+    return current_user.is_authenticated and current_user.is_admin
+
+@metrics.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get metrics in the Prometheus text format"""
+    if not authorised():
+        return jsonify({'success': False, 'message': "You do not have permission to view this!"}), 403
+    return Response(render(), mimetype='text/plain; version=0.0.4')
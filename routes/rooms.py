@@ -1,7 +1,11 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import login_required, current_user
-from models.database import db
+from models.database import db, unit_of_work
 from models.room import Room
+from models.user import User
+from models.chat_message import ChatMessage
+from models.room_directory import get_directory, invalidate_directory
+from sockets.presence import presence
 import random
 import string
 
@@ -9,36 +13,20 @@ rooms = Blueprint('rooms', __name__)
 
 @rooms.route('/rooms')
 @login_required
+@unit_of_work
 def room_list():
     """List all available rooms"""
     return render_template('rooms/list.html')
 
 @rooms.route('/api/rooms/list')
 @login_required
+@unit_of_work
 def list_rooms():
     """API endpoint to list all available rooms"""
     query = request.args.get('q', '').strip()
     
-    # Build base query
-    rooms_query = Room.query
-    
-    # Apply search filter if query provided
-    if query:
-        rooms_query = rooms_query.filter(Room.name.ilike(f'%{query}%'))
-    
-    # Get all matching rooms
-    rooms = rooms_query.all()
-    
-    # Format room data for response
-    room_data = [{
-        'id': room.id,
-        'name': room.name,
-        'is_private': room.is_private,
-        'member_count': room.member_count(),
-        'max_members': room.max_members,
-        'is_full': room.member_count() >= room.max_members,
-        'owner_name': room.owner.username
-    } for room in rooms]
+    # Get matching rooms from the cached room directory
+    room_data = get_directory(query)
     
     return jsonify({
         'success': True,
@@ -47,6 +35,7 @@ def list_rooms():
 
 @rooms.route('/rooms/create', methods=['GET', 'POST'])
 @login_required
+@unit_of_work
 def create_room():
     """Create and add a new room to the session"""
     if request.method == 'POST':
@@ -83,6 +72,7 @@ def create_room():
 
         db.session.add(room)
         db.session.commit()
+        invalidate_directory()
 
         flash('Room created successfully!', 'success')
         return redirect(url_for('rooms.load_room', room_id=room.id))
@@ -91,6 +81,7 @@ def create_room():
 
 @rooms.route('/rooms/join', methods=['POST'])
 @login_required
+@unit_of_work
 def join_room():
     """Join a room via ID or join code"""
     room_id = request.form.get('room_id')
@@ -135,12 +126,14 @@ def join_room():
     room.members.append(current_user)
     current_user.room_id = room.id
     db.session.commit()
+    invalidate_directory()
 
     flash(f"Successfully joined {room.name}!", 'success')
     return redirect(url_for('rooms.load_room', room_id=room.id))
 
 @rooms.route('/rooms/<int:room_id>')
 @login_required
+@unit_of_work
 def load_room(room_id):
     """Load a specific room"""
     room = Room.query.get_or_404(room_id)
@@ -162,12 +155,28 @@ def load_room(room_id):
 
 @rooms.route('/api/rooms/search')
 @login_required
+@unit_of_work
 def search_rooms():
     """API endpoint for searching specific rooms"""
     query = request.args.get('q', '')
 
     # Base query: no filter - all rooms
-    base_query = Room.query
+    # Owner names and member counts come from the same query, not one per room
+    member_counts = db.session.query(
+        User.room_id,
+        db.func.count(User.id).label('member_count')
+    ).filter(User.room_id.isnot(None)).group_by(User.room_id).subquery()
+
+    owner = db.aliased(User)
+    base_query = db.session.query(
+        Room,
+        owner.username,
+        db.func.coalesce(member_counts.c.member_count, 0)
+    ).join(
+        owner, owner.id == Room.owner_id
+    ).outerjoin(
+        member_counts, member_counts.c.room_id == Room.id
+    )
 
     # Apply search filter if used
     if query:
@@ -175,10 +184,36 @@ def search_rooms():
 
     # Get results
     rooms = base_query.all()
-    return jsonify([room.format_dict() for room in rooms])
+    return jsonify([room.format_dict(owner_name, member_count) for room, owner_name, member_count in rooms])
+
+@rooms.route('/api/rooms/<int:room_id>/messages')
+@login_required
+@unit_of_work
+def get_messages(room_id):
+    """API endpoint for a page of a room's chat history"""
+    if current_user.room_id != room_id:
+        return jsonify({
+            'success': False,
+            'message': 'You are not a member of this room!'
+        }), 403
+    
+    before = request.args.get('before')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 100)
+
+    try:
+        messages, cursor = ChatMessage.get_history(room_id, before=before, limit=limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'messages': messages,
+        'next_cursor': cursor
+    })
 
 @rooms.route('/api/rooms/<int:room_id>/leave', methods=['POST'])
 @login_required
+@unit_of_work
 def leave_room(room_id):
     """Remove user from their current room"""
     room = Room.query.get_or_404(room_id)
@@ -192,13 +227,17 @@ def leave_room(room_id):
     room.members.remove(current_user)
 
     # If user is the owner of the room, close the room
-    if room.is_owner(current_user.id):
-        db.session.delete(room)
     # If room is empty after user leaves, close the room
-    elif not room.members:
+    closed = room.is_owner(current_user.id) or not room.members
+    if closed:
+        # Clear every member's room in one UPDATE, not one per member
+        db.session.query(User).filter(User.room_id == room_id).update({'room_id': None})
         db.session.delete(room)
 
     db.session.commit()
+    invalidate_directory()
+    if closed:
+        presence.close_room(room_id)
     return jsonify({
         'success': True,
         'message': 'Left the room successfully'
@@ -206,6 +245,7 @@ def leave_room(room_id):
 
 @rooms.route('/api/rooms/join', methods=['POST'])
 @login_required
+@unit_of_work
 def join_room_api():
     """API endpoint to join a room"""
     data = request.get_json()
@@ -258,6 +298,7 @@ def join_room_api():
     # Add user to new room
     current_user.room_id = room.id
     db.session.commit()
+    invalidate_directory()
 
     return jsonify({
         'success': True,
@@ -0,0 +1,180 @@
+from flask import current_app
+from models.database import db
+from models.chat_message import ChatMessage
+from datetime import datetime, timezone
+from collections import deque
+import atexit
+import os
+import time
+
+# Time-ordered message IDs: milliseconds since EPOCH | worker ID | sequence
+EPOCH = 1735689600000 # 2025-01-01 UTC in milliseconds
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+
+class MessageIDs:
+    """Generate unique, time-ordered 63-bit message IDs without the database"""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id % (1 << WORKER_BITS)
+        self.last_ms = 0
+        self.sequence = 0
+
+    def next_id(self):
+        now_ms = int(time.time() * 1000)
+        if now_ms <= self.last_ms:
+            # Same (or earlier) millisecond - use the next sequence number
+            now_ms = self.last_ms
+            self.sequence = (self.sequence + 1) % (1 << SEQUENCE_BITS)
+            if self.sequence == 0:
+                now_ms += 1 # Sequence used up - borrow the next millisecond
+        else:
+            self.sequence = 0
+        self.last_ms = now_ms
+
+        return ((now_ms - EPOCH) << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self.sequence
+
+def chat_worker_id(config):
+    """Get this worker's ID for MessageIDs, raises RuntimeError if it isn't valid
+
+    Workers sharing a message queue (and database) must each set their own
+    CHAT_WORKER_ID, as process IDs can repeat across hosts and containers. A
+    lone worker uses its process ID."""
+    worker_id = config.get('CHAT_WORKER_ID')
+    if worker_id is None:
+        if config.get('SOCKETIO_MESSAGE_QUEUE'):
+            raise RuntimeError('CHAT_WORKER_ID must be set to a different number (0-1023) on every worker sharing SOCKETIO_MESSAGE_QUEUE')
+        return os.getpid()
+    if not 0 <= worker_id < 1 << WORKER_BITS:
+        raise RuntimeError(f'CHAT_WORKER_ID must be 0-{(1 << WORKER_BITS) - 1}, got {worker_id}')
+    return worker_id
+
+class ChatBuffer:
+    """Write-behind buffer for chat messages
+
+    Messages are broadcast straight away with an ID from MessageIDs and
+    saved to the database in bulk inserts every flush_interval seconds or
+    flush_size messages. If the database falls behind and max_pending
+    messages are waiting, the sender flushes synchronously (back-pressure)."""
+
+    def __init__(self):
+        self.pending = deque()
+        self.ids = None
+        self.app = None
+        self.running = False
+
+        # Defaults (replaced by config in start)
+        self.flush_interval = 0.25
+        self.flush_size = 200
+        self.max_pending = 10000
+
+        # Stats
+        self.flushed = 0
+        self.dropped = 0
+
+    def start(self, app):
+        """Start flushing from a background green thread"""
+        if self.running:
+            return
+        self.app = app
+        self.ids = MessageIDs(chat_worker_id(app.config)) # Fail at startup, not on the first message
+        self.running = True
+
+        self.flush_interval = app.config.get('CHAT_FLUSH_INTERVAL', self.flush_interval)
+        self.flush_size = app.config.get('CHAT_FLUSH_SIZE', self.flush_size)
+        self.max_pending = app.config.get('CHAT_MAX_PENDING', self.max_pending)
+
+        app.extensions['socketio'].start_background_task(self.run)
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and save everything still waiting"""
+        self.running = False
+        if self.app:
+            with self.app.app_context():
+                self.flush_all()
+
+    def next_id(self, app):
+        if self.ids is None:
+            self.ids = MessageIDs(chat_worker_id(app.config))
+        return self.ids.next_id()
+
+    def add(self, message_content, room_id, user_id):
+        """Queue a message to be saved, returns its (ID, timestamp)"""
+        message_id = self.next_id(current_app)
+        timestamp = datetime.now(timezone.utc)
+        self.pending.append({
+            'id': message_id,
+            'message_content': message_content,
+            'timestamp': timestamp,
+            'room_id': room_id,
+            'user_id': user_id
+        })
+
+        if not self.running:
+            # No flusher in this process - save straight away
+            self.flush_all()
+        elif len(self.pending) >= self.max_pending:
+            # Database is falling behind - make the sender wait for it
+            self.flush_all()
+
+        return message_id, timestamp
+
+    def flush(self):
+        """Save up to one batch of messages, returns the number saved"""
+        batch = []
+        while self.pending and len(batch) < self.flush_size:
+            batch.append(self.pending.popleft())
+        if not batch:
+            return 0
+
+        saved = len(batch)
+        try:
+            db.session.execute(db.insert(ChatMessage), batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Save messages one at a time so one bad message (e.g. its
+            # room was deleted) doesn't lose the whole batch
+            for row in batch:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(db.insert(ChatMessage), row)
+                except Exception as e:
+                    saved -= 1
+                    self.dropped += 1
+                    current_app.logger.error(f'Dropped chat message {row["id"]}: {e}')
+            db.session.commit()
+
+        self.flushed += saved
+        return len(batch)
+
+    def flush_all(self):
+        """Save every waiting message"""
+        while self.flush():
+            pass
+
+    def run(self):
+        """Flusher loop (runs as a green thread)"""
+        socketio = self.app.extensions['socketio']
+
+        while self.running:
+            try:
+                with self.app.app_context():
+                    # Keep flushing full batches, otherwise wait for the interval
+                    while self.flush() == self.flush_size:
+                        socketio.sleep(0)
+            except Exception as e:
+                self.app.logger.error(f'Chat buffer error: {e}')
+            socketio.sleep(self.flush_interval)
+
+    def stats(self):
+        """Get chat buffer statistics"""
+        return {
+            'pending': len(self.pending),
+            'flushed': self.flushed,
+            'dropped': self.dropped
+        }
+
+# Chat buffer for this process
+chat_buffer = ChatBuffer()
@@ -1,80 +1,102 @@
+from flask import request
 from flask_socketio import emit, join_room as socket_join_room, leave_room as socket_leave_room
 from flask_login import current_user
-from models.database import db
-from models.room import Room
-from models.chat_message import ChatMessage
+from models.database import unit_of_work
+from models.metrics import observe_event, socket_connections
+from sockets.chat_buffer import chat_buffer
+from sockets.notify import user_room
+from sockets.presence import presence, member_dict
 
 def init_socket_events(socketio):
+    def announce_join(room_id, member):
+        """Tell a room a User has joined"""
+        emit('member_joined', {'member': member_dict(member)}, room=str(room_id), include_self=False)
+        emit('status', {'message': f'{member["username"]} joined the room.'}, room=str(room_id))
+
+    def announce_leave(left, in_room=False):
+        """Tell a room a User has left, or only gone offline if they are still
+        in_room (left is a (room ID, member) from presence.remove)"""
+        if not left:
+            return
+        room_id, member = left
+        emit('member_left', {'id': member['id'], 'in_room': in_room}, room=str(room_id))
+        status = 'went offline' if in_room else 'left the room'
+        emit('status', {'message': f'{member["username"]} {status}.'}, room=str(room_id))
+
     @socketio.on('connect')
-    def connect():
+    @observe_event
+    @unit_of_work
+    def connect(auth=None):
         """Handle client connection to Socket.IO server"""
         if not current_user.is_authenticated:
             return False
+        socket_connections.inc()
         
+        # Join User's private room for personal notifications
+        socket_join_room(user_room(current_user.id))
+
         # If user is in a room, join the socket room
         if current_user.room_id:
             socket_join_room(str(current_user.room_id))
+            member, _ = presence.add(request.sid, current_user.room_id, current_user)
+            if member:
+                announce_join(current_user.room_id, member)
+
+    @socketio.on('disconnect')
+    @observe_event
+    def disconnect(reason=None):
+        """Handle client disconnection (closed tab, lost connection)"""
+        socket_connections.dec()
+        # User is still a member of their room until they leave it
+        announce_leave(presence.remove(request.sid), in_room=True)
 
     @socketio.on('join')
+    @observe_event
+    @unit_of_work
     def join(data):
         """Handle user joining a room"""
-        room_id = str(data.get('room_id'))
-        socket_join_room(room_id)
-        emit('status', {'message': f'{current_user.username} joined the room.'}, room=room_id)
+        room_id = int(data.get('room_id'))
+        socket_join_room(str(room_id))
+
+        # Only members of the room are listed
+        if current_user.room_id != room_id:
+            return
 
-        # Update member count/list for all users in the room
-        room = Room.query.get(room_id)
-        if room:
-            emit('member_update', {
-                'count': room.member_count(),
-                'members': [{
-                    'id': m.id,
-                    'username': m.username,
-                    'is_owner': m == room.owner
-                } for m in room.members]
-            }, room=room_id)
+        member, left = presence.add(request.sid, room_id, current_user)
+        announce_leave(left)
+        if member:
+            announce_join(room_id, member)
+
+        # Send the full member list to the joining socket only
+        emit('member_update', presence.snapshot(room_id))
     
     @socketio.on('leave')
+    @observe_event
+    @unit_of_work
     def leave(data):
         """Handle user leaving a room"""
         room_id = str(data.get('room_id'))
         socket_leave_room(room_id)
-        emit('status', {'message': f'{current_user.username} left the room.'}, room=room_id)
-
-        # Update member count/list for all users in the room
-        room = Room.query.get(room_id)
-        if room:
-            emit('member_update', {
-                'count': room.member_count(),
-                'members': [{
-                    'id': m.id,
-                    'username': m.username,
-                    'is_owner': m == room.owner
-                } for m in room.members]
-            }, room=room_id)
+        announce_leave(presence.remove(request.sid))
 
     @socketio.on('chat')
+    @observe_event
+    @unit_of_work
     def chat(data):
         """Handle user chat inputs"""
         room_id = int(data.get('room_id'))
         message_content = data.get('message', '').strip()
 
-        if not message_content:
+        if not message_content or len(message_content) > 500:
             return
         
-        # Save message to database
-        message = ChatMessage(
-            message_content=message_content,
-            room_id=room_id,
-            user_id=current_user.id,
-        )
-        db.session.add(message)
-        db.session.commit()
+        # Queue message to be saved by the chat buffer (write-behind)
+        message_id, timestamp = chat_buffer.add(message_content, room_id, current_user.id)
 
-        # Send message to room
+        # Send message to room straight away
         emit('chat', {
-            'id': message.id,
-            'message_content': message.message_content,
-            'timestamp': message.timestamp.isoformat(),
+            'id': str(message_id), # 64-bit IDs don't fit in a JavaScript number
+            'message_content': message_content,
+            'timestamp': timestamp.isoformat(),
             'user': current_user.username
         }, room=str(room_id))
\ No newline at end of file
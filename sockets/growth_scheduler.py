@@ -0,0 +1,184 @@
+from models.database import db
+from models.growing_plant import GrowingPlant
+from models.user import User
+from sockets.notify import notify_user
+from datetime import datetime, timedelta, timezone
+from heapq import heappush, heappop, heapify
+from sqlalchemy import event
+import time
+
+def ready_timestamp(ready_at):
+    """Get the UNIX time of a plant's ready_at"""
+    if not ready_at.tzinfo:
+        ready_at = ready_at.replace(tzinfo=timezone.utc) # SQLite returns naive UTC datetimes
+    return ready_at.timestamp()
+
+class GrowthScheduler:
+    """Min-heap of growing plants keyed on ready time
+
+    Only plants that finish within the horizon are kept in memory, the
+    rest stay in the growing_plant table and are loaded by a periodic
+    refill, so memory is bounded no matter how many plants are growing.
+    Due plants are marked ready in batches and their owners notified."""
+
+    def __init__(self, horizon=600, batch_size=500, max_pending=100000, tick=1.0):
+        self.horizon = horizon # Seconds ahead to keep in memory
+        self.batch_size = batch_size # Most plants marked ready per UPDATE
+        self.max_pending = max_pending # Hard cap on in-memory timers
+        self.tick = tick # Longest sleep between checks
+
+        self.heap = [] # (ready time, plant ID)
+        self.pending = {} # plant ID --> (ready time, user ID)
+        self.app = None
+        self.running = False
+        self.next_refill = 0
+
+        # Stats
+        self.fired = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+
+    def start(self, app):
+        """Load outstanding plants and start the scheduler loop"""
+        if self.running:
+            return
+        self.app = app
+        self.running = True
+
+        with app.app_context():
+            self.refill()
+        app.extensions['socketio'].start_background_task(self.run)
+
+    def stop(self):
+        self.running = False
+
+    def schedule(self, plant_id, user_id, ready_at):
+        """Add a plant timer (ready_at is a UNIX time)"""
+        if ready_at > time.time() + self.horizon or len(self.pending) >= self.max_pending:
+            return False # Picked up by a later refill
+
+        self.pending[plant_id] = (ready_at, user_id)
+        heappush(self.heap, (ready_at, plant_id))
+        return True
+
+    def cancel(self, plant_ids):
+        """Cancel timers for harvested or deleted plants"""
+        for plant_id in plant_ids:
+            # Heap entry is skipped when popped
+            self.pending.pop(plant_id, None)
+        self.compact()
+
+    def cancel_user(self, user_id):
+        """Cancel every timer for a deleted User"""
+        self.cancel([plant_id for plant_id, (_, owner) in self.pending.items() if owner == user_id])
+
+    def compact(self):
+        """Rebuild the heap once it is mostly cancelled entries"""
+        if len(self.heap) > 2 * len(self.pending) + 1024:
+            self.heap = [(ready_at, plant_id) for plant_id, (ready_at, _) in self.pending.items()]
+            heapify(self.heap)
+
+    def refill(self):
+        """Load plants finishing within the horizon from the database"""
+        now = time.time()
+        self.next_refill = now + self.horizon / 2
+        horizon_end = datetime.now(timezone.utc) + timedelta(seconds=self.horizon)
+
+        # Index range scan on ready_at (includes overdue plants never notified)
+        rows = db.session.query(
+            GrowingPlant.id,
+            GrowingPlant.user_id,
+            GrowingPlant.ready_at
+        ).filter(
+            GrowingPlant.ready_at <= horizon_end,
+            GrowingPlant.is_ready.is_not(True)
+        ).execution_options(yield_per=1000)
+
+        for row in rows:
+            if row.id not in self.pending:
+                self.schedule(row.id, row.user_id, ready_timestamp(row.ready_at))
+        db.session.commit()
+
+    def pop_due(self, now):
+        """Get up to one batch of due timers"""
+        due = []
+        while self.heap and self.heap[0][0] <= now and len(due) < self.batch_size:
+            ready_at, plant_id = heappop(self.heap)
+            entry = self.pending.get(plant_id)
+            # Skip cancelled and rescheduled entries
+            if not entry or entry[0] != ready_at:
+                continue
+            del self.pending[plant_id]
+            due.append((plant_id, ready_at))
+        return due
+
+    def fire(self, due, now):
+        """Mark due plants ready in one UPDATE and notify their owners"""
+        ready_at = dict(due)
+
+        # Only rows still not ready are returned, so plants another
+        # worker already marked are not notified twice
+        rows = db.session.execute(
+            db.update(GrowingPlant).where(
+                GrowingPlant.id.in_(ready_at.keys()),
+                GrowingPlant.is_ready.is_not(True)
+            ).values(is_ready=True).returning(GrowingPlant.id, GrowingPlant.user_id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        db.session.commit()
+
+        for row in rows:
+            notify_user(row.user_id, 'plant_ready', {'id': row.id})
+
+        for plant_id, ready in due:
+            lag = now - ready
+            self.fired += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.total_lag += lag
+
+    def run(self):
+        """Scheduler loop (runs as a green thread)"""
+        socketio = self.app.extensions['socketio']
+
+        while self.running:
+            now = time.time()
+            due = []
+            try:
+                with self.app.app_context():
+                    due = self.pop_due(now)
+                    if due:
+                        self.fire(due, now)
+                    if now >= self.next_refill:
+                        self.refill()
+            except Exception as e:
+                self.app.logger.error(f'Growth scheduler error: {e}')
+
+            # Sleep until the next timer is due (at most one tick)
+            if due and len(due) == self.batch_size:
+                delay = 0
+            elif self.heap:
+                delay = min(self.tick, max(0, self.heap[0][0] - time.time()))
+            else:
+                delay = self.tick
+            socketio.sleep(delay)
+
+    def stats(self):
+        """Get scheduler statistics"""
+        return {
+            'pending': len(self.pending),
+            'heap_size': len(self.heap),
+            'fired': self.fired,
+            'last_fire_lag': self.last_lag,
+            'max_fire_lag': self.max_lag,
+            'avg_fire_lag': self.total_lag / self.fired if self.fired else 0.0
+        }
+
+# Scheduler for this process
+scheduler = GrowthScheduler()
+
+@event.listens_for(User, 'after_delete')
+def cancel_deleted_user(mapper, connection, user):
+    """Drop a deleted User's timers"""
+    scheduler.cancel_user(user.id)
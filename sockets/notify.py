@@ -0,0 +1,23 @@
+from flask import current_app
+
+def user_room(user_id):
+    """Get the name of a User's private socket room"""
+    return f'user-{user_id}'
+
+def notify_user(user_id, event, data):
+    """Emit an event to every socket a User has open"""
+    socketio = current_app.extensions['socketio']
+    socketio.emit(event, data, to=user_room(user_id), namespace='/')
+
+def notify_inventory_changed(user, seeds=None, plants_added=None, plants_removed=None):
+    """Send a User the changes made to their inventory
+
+    seeds          -- updated seed entries (quantity 0 means removed)
+    plants_added   -- plant inventory entries with the number of plants added
+    plants_removed -- inventory entry IDs, once for every plant removed"""
+    notify_user(user.id, 'inventory_changed', {
+        'version': user.inventory_version,
+        'seeds': seeds or [],
+        'plants_added': plants_added or [],
+        'plants_removed': plants_removed or []
+    })
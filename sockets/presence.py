@@ -0,0 +1,132 @@
+from models.database import db
+from models.room import Room
+from models.user import User
+
+class RoomPresence:
+    """In-memory registry of the Users connected to each room
+
+    Filled from socket connect/join and emptied by leave/disconnect, so
+    member events never need to load a room's member list. A User can
+    have several sockets open (tabs), they only join or leave a room when
+    their first socket arrives or their last socket goes.
+
+    Only sockets connected to this process are known. With several
+    workers the deltas still reach every worker through the message
+    queue, and snapshots list the room's members from the database."""
+
+    def __init__(self):
+        self.rooms = {} # room ID --> {user ID: member entry}
+        self.sockets = {} # socket ID --> (room ID, user ID)
+        self.owners = {} # room ID --> owner user ID
+
+    def get_owner(self, room_id):
+        """Get a room's owner ID (one query per room, then cached)"""
+        if room_id not in self.owners:
+            owner_id = db.session.query(Room.owner_id).filter(Room.id == room_id).scalar()
+            if owner_id is None:
+                return None # Room doesn't exist
+            self.owners[room_id] = owner_id
+        return self.owners[room_id]
+
+    def add(self, sid, room_id, user):
+        """Add a socket to a room
+
+        Returns (member, left) where member is the User's entry if they
+        just joined the room (None if already present) and left is the
+        (room ID, member) the socket was moved out of, if any."""
+        left = None
+        current = self.sockets.get(sid)
+        if current:
+            if current[0] == room_id:
+                return None, None
+            left = self.remove(sid)
+
+        owner_id = self.get_owner(room_id)
+        if owner_id is None:
+            return None, left
+
+        members = self.rooms.setdefault(room_id, {})
+        member = members.get(user.id)
+        joined = member is None
+        if joined:
+            member = members[user.id] = {
+                'id': user.id,
+                'username': user.username,
+                'is_owner': user.id == owner_id,
+                'sids': set()
+            }
+        member['sids'].add(sid)
+        self.sockets[sid] = (room_id, user.id)
+
+        return (member if joined else None), left
+
+    def remove(self, sid):
+        """Remove a socket from its room
+
+        Returns (room ID, member) if the User has no sockets left in
+        the room, otherwise None"""
+        current = self.sockets.pop(sid, None)
+        if not current:
+            return None
+
+        room_id, user_id = current
+        members = self.rooms.get(room_id, {})
+        member = members.get(user_id)
+        if not member:
+            return None
+
+        member['sids'].discard(sid)
+        if member['sids']:
+            return None # Still connected from another socket
+
+        del members[user_id]
+        if not members:
+            self.close_room(room_id)
+        return room_id, member
+
+    def close_room(self, room_id):
+        """Forget a room (when it's emptied or deleted)"""
+        for member in self.rooms.pop(room_id, {}).values():
+            for sid in member['sids']:
+                self.sockets.pop(sid, None)
+        self.owners.pop(room_id, None)
+
+    def snapshot(self, room_id):
+        """Get the full member list of a room
+
+        Members are the room's Users in the database, online if they have a
+        socket in the room. Only this process's sockets are known, so with
+        several workers the rest are marked online by member_joined deltas."""
+        owner_id = self.get_owner(room_id)
+        connected = self.rooms.get(room_id, {})
+        rows = db.session.query(User.id, User.username).filter(User.room_id == room_id).all()
+        members = [{
+            'id': row.id,
+            'username': row.username,
+            'is_owner': row.id == owner_id,
+            'online': row.id in connected
+        } for row in rows]
+
+        return {
+            'count': len(members),
+            'members': members
+        }
+
+    def stats(self):
+        return {
+            'rooms': len(self.rooms),
+            'members': sum(len(members) for members in self.rooms.values()),
+            'sockets': len(self.sockets)
+        }
+
+def member_dict(member):
+    """Format a member entry for sending to clients"""
+    return {
+        'id': member['id'],
+        'username': member['username'],
+        'is_owner': member['is_owner'],
+        'online': bool(member['sids'])
+    }
+
+# Room presence for this process
+presence = RoomPresence()
@@ -3,9 +3,16 @@ const seedInventory = document.getElementById('seed-inventory');
 const plantInventory = document.getElementById('plant-inventory');
 const growingPlants = document.getElementById('growing-plants');
 const plantSeedBtn = document.getElementById('plant-seed');
+const harvestAllBtn = document.getElementById('harvest-all');
 const inventoryTabs = document.querySelectorAll('.tab-btn');
 let selectedSeedID = null; // Track which seed User has selected
 let growingPlantTimers = new Map(); // Track growth countdown timers for plant displays
+let inventoryState = { seeds: [], plants: [], nextCursor: null, version: null }; // Loaded part of User's inventory, kept up to date by server pushes
+let loadingPlants = false; // Whether a page of plants is being loaded
+let inventoryReloads = 0; // Times in a row the inventory changed while loading the next page of plants
+const PLANT_PAGE_SIZE = 50; // Plants loaded at a time as the plant lists are scrolled
+const MAX_INVENTORY_RELOADS = 3; // Reloads before a changed page of plants is kept as it is
+const plantListEnds = document.querySelectorAll('.plant-list-end'); // Markers after each list of plants (inventory and sell tab)
 
 // Setup inventory tab switching
 
@@ -41,22 +48,8 @@ function startGrowTimer(plantID, elapsedTime, totalTime) {
         const progressBar = document.querySelector(`#plant-${plantID} .progress`);
         if (timeDisplay && progressBar) {
             if (timeLeft === 0) {
-                timeDisplay.textContent = 'Ready!';
-                progressBar.style.width = '100%';
-                // Add harvest button
-                const plant = document.querySelector(`#plant-${plantID}`);
-                if (plant && !plant.querySelector('.btn-success')) {
-                    plant.innerHTML += `
-                        <button class="btn btn-success" onclick="harvestPlant(${plantID})">
-                            <span class="btn btn-icon">🌿</span> Harvest
-                        </button>
-                    `;
-                }
-                // Stop the timer
-                clearInterval(timer);
-                growingPlantTimers.delete(plantID);
-                // Reload growing plants to add ready class
-                loadGrowingPlants();
+                // Server confirms with a plant_ready event (growth scheduler)
+                markPlantReady(plantID);
             } else {
                 timeDisplay.textContent = `${timeLeft}s`;
                 const progress = ((currentElapsed / totalTime) * 100);
@@ -72,11 +65,146 @@ function startGrowTimer(plantID, elapsedTime, totalTime) {
     growingPlantTimers.set(plantID, timer);
 }
 
-// Load and Display Inventory
+// Show a growing plant as ready to harvest
+function markPlantReady(plantID) {
+    // Stop the timer
+    if (growingPlantTimers.has(plantID)) {
+        clearInterval(growingPlantTimers.get(plantID));
+        growingPlantTimers.delete(plantID);
+    }
+
+    const plant = document.querySelector(`#plant-${plantID}`);
+    if (!plant) return;
+
+    plant.classList.add('ready');
+    plant.querySelector('.plant-time').textContent = 'Ready!';
+    plant.querySelector('.progress').style.width = '100%';
+    // Add harvest button
+    if (!plant.querySelector('.btn-success')) {
+        plant.innerHTML += `
+            <button class="btn btn-success" onclick="harvestPlant(${plantID})">
+                <span class="btn-icon">🌿</span> Harvest
+            </button>
+        `;
+    }
+}
+
+// Get a page of User's seeds or plants
+async function fetchInventoryPage(type, limit, cursor) {
+    const after = cursor ? `&after=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`/api/inventory/${type}?limit=${limit}${after}`);
+    return response.json();
+}
+
+// Load Inventory from server (every seed and the first page of plants)
 async function loadInventory() {
     try {
-        const response = await fetch('/api/inventory');
-        const data = await response.json();
+        let seeds = [];
+        let cursor = null;
+        do {
+            const page = await fetchInventoryPage('seeds', 200, cursor);
+            seeds = seeds.concat(page.seeds);
+            cursor = page.next_cursor;
+        } while (cursor);
+        const plants = await fetchInventoryPage('plants', PLANT_PAGE_SIZE, null);
+
+        inventoryState = { seeds: seeds, plants: plants.plants, nextCursor: plants.next_cursor, version: plants.version };
+        inventoryUpdated();
+        watchPlantListEnds();
+    } catch (error) {
+        console.error('Error loading inventory:', error);
+    }
+}
+
+// Load the next page of plants
+async function loadMorePlants() {
+    if (!inventoryState.nextCursor || loadingPlants) return;
+
+    loadingPlants = true;
+    try {
+        const page = await fetchInventoryPage('plants', PLANT_PAGE_SIZE, inventoryState.nextCursor);
+        if (page.version !== inventoryState.version && inventoryReloads < MAX_INVENTORY_RELOADS) {
+            // Inventory changed between pages, start again from the first
+            inventoryReloads++;
+            loadingPlants = false;
+            loadInventory();
+            return;
+        }
+        // Still changing after a few reloads, keep the page and let pushed changes catch it up
+        inventoryReloads = 0;
+        // Skip plants a pushed change has already added
+        const loaded = new Set(inventoryState.plants.map(plant => plant.id));
+        inventoryState.plants = inventoryState.plants.concat(page.plants.filter(plant => !loaded.has(plant.id)));
+        inventoryState.nextCursor = page.next_cursor;
+        inventoryUpdated();
+    } catch (error) {
+        console.error('Error loading plants:', error);
+    }
+    loadingPlants = false;
+    watchPlantListEnds();
+}
+
+// Load more plants whenever the end of a plant list scrolls into view
+const plantListObserver = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) loadMorePlants();
+});
+
+// (Re)watch the ends of the plant lists - newly watched ends are checked
+// straight away, so lists shorter than the screen keep loading
+function watchPlantListEnds() {
+    plantListEnds.forEach(end => {
+        plantListObserver.unobserve(end);
+        plantListObserver.observe(end);
+    });
+}
+
+// Apply inventory changes pushed by the server
+function applyInventoryDelta(delta) {
+    // Update or remove changed seeds
+    delta.seeds.forEach(seed => {
+        const index = inventoryState.seeds.findIndex(s => s.id === seed.id);
+        if (seed.quantity <= 0) {
+            if (index !== -1) inventoryState.seeds.splice(index, 1);
+            if (selectedSeedID === seed.id) selectedSeedID = null;
+        } else if (index !== -1) {
+            inventoryState.seeds[index] = seed;
+        } else {
+            inventoryState.seeds.push(seed);
+        }
+    });
+
+    // Add harvested plants and remove sold ones (one entry per plant type and value, with a count)
+    // Plants are in ID order (plant type, then value) - new ones past the loaded pages come with a later page
+    const plants = new Map(inventoryState.plants.map(plant => [plant.id, plant]));
+    const last = inventoryState.plants[inventoryState.plants.length - 1];
+    delta.plants_added.forEach(added => {
+        const plant = plants.get(added.id);
+        if (plant) {
+            plant.count += added.count;
+        } else if (!inventoryState.nextCursor || added.id < last.id) {
+            plants.set(added.id, { ...added });
+        }
+    });
+    delta.plants_removed.forEach(id => {
+        const plant = plants.get(id);
+        if (plant && --plant.count <= 0) plants.delete(id);
+    });
+    inventoryState.plants = [...plants.values()].sort((a, b) => a.id - b.id);
+
+    inventoryState.version = delta.version;
+    inventoryUpdated();
+}
+
+// Redraw the inventory, and let the shop's sell tab redraw too
+function inventoryUpdated() {
+    renderInventory();
+    document.dispatchEvent(new Event('inventory-updated'));
+}
+
+// Display Inventory
+function renderInventory() {
+    try {
+        const data = inventoryState;
 
         // Load Seeds
         seedInventory.innerHTML = data.seeds.map(seed => `
@@ -95,6 +223,7 @@ async function loadInventory() {
                     <div class="item-icon">🌿</div>
                     <div class="item-info">
                         <div class="item-name">${plant.name}</div>
+                        <div class="item-quantity">x${plant.count}</div>
                     </div>
                 </div>
         `).join('');
@@ -102,7 +231,7 @@ async function loadInventory() {
         // Update plant seed button state
         plantSeedBtn.disable = !selectedSeedID;
     } catch (error) {
-        console.error('Error loading inventory:', error);
+        console.error('Error displaying inventory:', error);
     }
 }
 
@@ -151,7 +280,7 @@ window.toggleSeedSelect = (id) => {
     // Select seed on click
     // If already selected - unselect
     selectedSeedID = (selectedSeedID === id) ? null : id;
-    loadInventory(); // Refresh inventory to show selection
+    renderInventory(); // Redraw inventory to show selection
 };
 
 // Plant a Seed
@@ -168,7 +297,7 @@ plantSeedBtn.addEventListener('click', async () => {
         const data = await response.json();
         if (data.success) {
             selectedSeedID = null;
-            loadInventory();
+            // Seed change is pushed by the server (inventory_changed)
             loadGrowingPlants();
             appUtils.jsMessage(data.message, 'success');
         } else {
@@ -191,7 +320,6 @@ window.harvestPlant = async (plantID) => {
         if (data.success) {
             appUtils.jsMessage(data.message, 'success');
             loadGrowingPlants();
-            loadInventory();
         } else {
             appUtils.jsMessage(data.message || 'Failed to harvest plant.', 'error');
         }
@@ -201,11 +329,38 @@ window.harvestPlant = async (plantID) => {
     }
 };
 
-// Automatically refresh plants and inventory periodically
+// Harvest All Ready Plants
+harvestAllBtn.addEventListener('click', async () => {
+    try {
+        const response = await fetch('/api/plants/harvest-all', {
+            method: 'POST',
+        });
+        const data = await response.json();
+
+        if (data.success) {
+            const collected = data.plants
+                .map(plant => `x${plant.count} ${plant.name} [${plant.rarity}]`)
+                .join(', ');
+            appUtils.jsMessage(`${data.message} ${collected}`, 'success');
+            loadGrowingPlants();
+        } else {
+            appUtils.jsMessage(data.message || 'Failed to harvest plants.', 'error');
+        }
+    } catch (error) {
+        console.error('Error harvesting plants:', error);
+        appUtils.jsMessage('Failed to harvest plants. Please try again.', 'error');
+    }
+});
+
+// Server pushes inventory changes and finished plants
+socket.on('inventory_changed', applyInventoryDelta);
+socket.on('plant_ready', (data) => markPlantReady(data.id));
+
+// Safety refresh in case a pushed event was missed
 setInterval(() => {
     loadInventory();
     loadGrowingPlants();
-}, 60000); // Every minute
+}, 600000); // Every 10 minutes
 
 // Refresh on socket reconnect
 socket.on('reconnect', () => {
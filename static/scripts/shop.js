@@ -7,6 +7,8 @@ const seedCatalog = document.querySelector('.seed-catalog');
 const plantCatalog = document.querySelector('.plant-catalog');
 const buyBtn = document.getElementById('buy-seeds');
 const quantityInput = document.getElementById('seed-quantity');
+const sellRarity = document.getElementById('sell-rarity');
+const sellAllBtn = document.getElementById('sell-all');
 let selectedItemID = null;
 let selectedItemPrice = 0;
 let currentBalance = 0;
@@ -94,17 +96,21 @@ async function loadBuyTab() {
 
 // Load Sell Tab
 async function loadSellTab() {
-    try {
-        const response = await fetch('/api/inventory');
-        const data = await response.json();
+    await loadInventory(); // Refresh shared inventory (see game.js), the sell tab redraws once loaded
+}
 
-        plantCatalog.innerHTML = data.plants.map(plant => `
+// Display Sell Tab from the loaded pages of the shared inventory (more load as it is scrolled)
+function renderSellTab() {
+    sellAllBtn.disabled = inventoryState.plants.length === 0;
+    try {
+        plantCatalog.innerHTML = inventoryState.plants.map(plant => `
             <div class="shop-item plant-item" onclick="sellPlant(${plant.id})">
                 <div class="item-icon">🌿</div>
                 <div class="item-info">
                     <div class="item-name">${plant.name}</div>
                     <div class="item-details">
                         <div class="price">Value: $${plant.value}</div>
+                        <div class="item-quantity">x${plant.count}</div>
                     </div>
                 </div>
                 <div class="sell-overlay">
@@ -113,10 +119,17 @@ async function loadSellTab() {
             </div>
         `).join('');
     } catch (error) {
-        console.error('Error loading sell tab:', error);
+        console.error('Error displaying sell tab:', error);
     }
 }
 
+// Redraw sell tab when the inventory changes or more plants are loaded
+document.addEventListener('inventory-updated', () => {
+    if (shopPopup.style.display === 'block') {
+        renderSellTab();
+    }
+});
+
 // Open/Close Shop Popup
 openShopBtn.addEventListener('click', () => {
     shopPopup.style.display = 'block';
@@ -191,7 +204,6 @@ buyBtn.addEventListener('click', async () => {
             quantityInput.value = '1';
             buyBtn.disabled = true;
             loadBuyTab();
-            loadInventory();
             // Update User's balance
             const currencyDisplay = document.querySelector('.currency');
             if (currencyDisplay) {
@@ -218,8 +230,7 @@ window.sellPlant = async (plantID) => {
 
         const data = await response.json();
         if (data.success) {
-            loadSellTab();
-            loadInventory();
+            // Inventory and sell tab are updated by the pushed inventory_changed event
             // Update User's balance
             const currencyDisplay = document.querySelector('.currency');
             if (currencyDisplay) {
@@ -233,4 +244,33 @@ window.sellPlant = async (plantID) => {
         console.error('Error selling plant:', error);
         appUtils.jsMessage('Failed to sell plant! Please try again.', 'error');
     }
-};
\ No newline at end of file
+};
+
+// Sell every plant (or every plant of the selected rarity) in one request
+sellAllBtn.addEventListener('click', async () => {
+    const rarity = sellRarity.value;
+
+    try {
+        const response = await fetch('/api/shop/sell-bulk', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(rarity ? { rarity: rarity } : { all: true })
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            // Inventory and sell tab are updated by the pushed inventory_changed event
+            // Update User's balance
+            const currencyDisplay = document.querySelector('.currency');
+            if (currencyDisplay) {
+                currencyDisplay.textContent = `🪙 ${data.balance}`;
+            }
+            appUtils.jsMessage(data.message, 'success');
+        } else {
+            appUtils.jsMessage(data.message || 'Failed to sell plants', 'error');
+        }
+    } catch (error) {
+        console.error('Error selling plants:', error);
+        appUtils.jsMessage('Failed to sell plants! Please try again.', 'error');
+    }
+});
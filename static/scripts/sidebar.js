@@ -36,19 +36,81 @@ const initChat = () => {
         chatInput.value = '';
     }
 
+    // Create a span showing text (never parsed as HTML)
+    function createSpan(className, text) {
+        const span = document.createElement('span');
+        span.className = className;
+        span.textContent = text;
+        return span;
+    }
+
+    // Create a chat message element (stored messages are replayed to everyone who joins, so never as HTML)
+    function createMessage(data) {
+        const msgDiv = document.createElement('div');
+        msgDiv.className = 'chat-message';
+        msgDiv.append(
+            createSpan('chat-user', `${data.user}:`), ' ',
+            createSpan('chat-content', data.message_content), ' ',
+            createSpan('chat-timestamp', new Date(data.timestamp).toLocaleString()) // Display chat message in User's local time
+        );
+        return msgDiv;
+    }
+
+    // Chat History
+
+    let historyCursor = null; // Cursor for the next (older) page of history
+    let historyLoading = false;
+    let historyLoaded = false; // Set once the first page has loaded
+
+    // Load a page of older messages above the current ones
+    async function loadHistory() {
+        if (historyLoading || (historyLoaded && !historyCursor)) return;
+        historyLoading = true;
+
+        try {
+            const params = new URLSearchParams({ limit: 50 });
+            if (historyCursor) params.append('before', historyCursor);
+
+            const response = await fetch(`/api/rooms/${roomID}/messages?${params.toString()}`);
+            const data = await response.json();
+            if (!data.success) throw new Error(data.message);
+
+            // Keep the scroll position while adding messages above
+            const previousHeight = chatMessages.scrollHeight;
+            const page = document.createDocumentFragment();
+            data.messages.forEach(message => page.appendChild(createMessage(message)));
+            chatMessages.insertBefore(page, chatMessages.firstChild);
+
+            if (historyLoaded) {
+                chatMessages.scrollTop = chatMessages.scrollHeight - previousHeight;
+            } else {
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            }
+
+            historyCursor = data.next_cursor;
+            historyLoaded = true;
+        } catch (error) {
+            console.error('Error loading chat history:', error);
+        } finally {
+            historyLoading = false;
+        }
+    }
+
+    // Load older messages when scrolled to the top
+    chatMessages.addEventListener('scroll', () => {
+        if (chatMessages.scrollTop === 0) {
+            loadHistory();
+        }
+    });
+
+    loadHistory();
+
     // Socket Event Handlers
 
     // Chat Socket Handlers
 
     socket.on('chat', (data) => {
-        const msgDiv = document.createElement('div');
-        msgDiv.className = 'chat-message';
-        msgDiv.innerHTML = `
-            <span class="chat-user">${data.user}:</span>
-            <span class="chat-content">${data.message_content}</span>
-            <span class="chat-timestamp">${new Date(data.timestamp).toLocaleString()}</span>
-        `; // Display chat message in User's local time
-        chatMessages.appendChild(msgDiv);
+        chatMessages.appendChild(createMessage(data));
         chatMessages.scrollTop = chatMessages.scrollHeight;
     });
 
@@ -61,17 +123,48 @@ const initChat = () => {
     });
 
     // Member List Socket Handlers
+
+    // Create a member list element
+    function createMember(member) {
+        const memberDiv = document.createElement('div');
+        memberDiv.className = member.online ? 'member' : 'member offline';
+        memberDiv.dataset.userId = member.id;
+        const nameSpan = createSpan('member-name', member.username);
+        if (member.is_owner) {
+            const ownerIcon = createSpan('owner-icon', '👑');
+            ownerIcon.title = 'Room Owner';
+            nameSpan.append(' ', ownerIcon);
+        }
+        memberDiv.appendChild(nameSpan);
+        return memberDiv;
+    }
+
+    // Full member list (sent once when joining), online or not
     socket.on('member_update', (data) => {
         memberCount.textContent = data.count;
-        memberList.innerHTML = data.members
-            .map(member => `
-                <div class="member" data-user-id="${member.id}">
-                    <span class="member-name">
-                        ${member.username}
-                        ${member.is_owner ? '<span class="owner-icon" title="Room Owner">👑</span>' : ''}
-                    </span>
-                </div>
-            `).join('');
+        memberList.replaceChildren(...data.members.map(createMember));
+    });
+
+    // Member list changes (may come from any server worker)
+    socket.on('member_joined', (data) => {
+        const existing = memberList.querySelector(`[data-user-id="${data.member.id}"]`);
+        if (existing) {
+            existing.replaceWith(createMember(data.member));
+        } else {
+            memberList.appendChild(createMember(data.member));
+        }
+        memberCount.textContent = memberList.children.length;
+    });
+
+    // Members who only went offline stay listed
+    socket.on('member_left', (data) => {
+        const existing = memberList.querySelector(`[data-user-id="${data.id}"]`);
+        if (data.in_room) {
+            existing?.classList.add('offline');
+        } else {
+            existing?.remove();
+        }
+        memberCount.textContent = memberList.children.length;
     });
 }
 
@@ -11,10 +11,9 @@ if str(ROOT) not in sys.path:
 
 from app import create_app
 from models.database import db
-from models.plant import Plant
+from models.plant import Plant, RARITIES
 from models.seed import Seed
-
-RARITIES = ['common', 'uncommon', 'rare', 'epic', 'legendary',]
+from models.catalog import bump_catalog_version
 
 def add_plant():
     """Interactive function to add 
@@ -40,6 +39,7 @@ def add_plant():
 
     plant = Plant(name, rarity, min_value, max_value)
     db.session.add(plant)
+    bump_catalog_version() # Workers reload their content catalog
     db.session.commit()
     return plant
 
@@ -69,7 +69,7 @@ def add_seed():
 
     seed = Seed(name, description, cost, min_time, max_time)
     db.session.add(seed)
-    db.session.commit
+    db.session.commit() # Commit so the seed has an ID for its loot table entries
 
     # Add plants to seed loot table
 
@@ -95,6 +95,7 @@ def add_seed():
         else:
             print('Invalid input! Try again.')
 
+    bump_catalog_version() # Workers reload their content catalog
     db.session.commit()
     return seed
 
@@ -132,7 +133,7 @@ def main():
     # Parse the arguments
     args = parser.parse_args()
 
-    app = create_app()
+    app = create_app(start_services=False)
     with app.app_context():
         if args.action == 'list':
             if args.rarity:
@@ -0,0 +1,156 @@
+from pathlib import Path
+from collections import Counter
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, insert, select, MetaData, Table, Column, Integer, String, LargeBinary
+from models.base_content import BASE_PLANTS
+from models.plant_stack import pack_values, unpack_values, entry_id
+
+# How often each rarity is harvested (roughly the base loot tables)
+RARITY_WEIGHTS = {'common': 60, 'uncommon': 25, 'rare': 10, 'epic': 4, 'legendary': 1}
+
+# Both layouts, without foreign keys so they can be built on their own
+metadata = MetaData()
+# One row per plant (the old PlantInv)
+plant_inv = Table(
+    'plant_inv', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', String(36), nullable=False, index=True),
+    Column('plant_id', Integer, nullable=False),
+    Column('value', Integer, nullable=False)
+)
+# One row per User per plant type (models/plant_stack.py)
+plant_stack = Table(
+    'plant_stack', metadata,
+    Column('user_id', String(36), primary_key=True),
+    Column('plant_id', Integer, primary_key=True),
+    Column('count', Integer, nullable=False),
+    Column('histogram', LargeBinary, nullable=False)
+)
+
+def roll_inventory(rng, plants):
+    """Get (plant_id, value) for a number of plants harvested at random"""
+    weights = [RARITY_WEIGHTS[rarity] for _, rarity, _, _ in BASE_PLANTS]
+    picks = rng.choices(range(len(BASE_PLANTS)), weights, k=plants)
+    return [(i + 1, rng.randint(BASE_PLANTS[i][2], BASE_PLANTS[i][3])) for i in picks]
+
+def fill(engine, inventories):
+    """Save every player's plants in both layouts, returning the rows in each"""
+    rows = {'plant_inv': [], 'plant_stack': []}
+    for user_id, plants in inventories.items():
+        rows['plant_inv'].extend({'user_id': user_id, 'plant_id': plant_id, 'value': value} for plant_id, value in plants)
+        stacks = {}
+        for plant_id, value in plants:
+            stacks.setdefault(plant_id, Counter())[value] += 1
+        rows['plant_stack'].extend({
+            'user_id': user_id, 'plant_id': plant_id, 'count': values.total(), 'histogram': pack_values(values)
+        } for plant_id, values in stacks.items())
+
+    with engine.begin() as connection:
+        connection.execute(insert(plant_inv), rows['plant_inv'])
+        connection.execute(insert(plant_stack), rows['plant_stack'])
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+def table_bytes(engine, table):
+    """Bytes on disk used by a table and its indexes"""
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(
+            'SELECT SUM(pgsize) FROM dbstat WHERE name = ? OR name IN '
+            '(SELECT name FROM sqlite_master WHERE type = \'index\' AND tbl_name = ?)', (table, table)
+        ).scalar()
+
+def read_rows(connection, user_id):
+    """Build one player's inventory from plant_inv, like get_inv did"""
+    rows = connection.execute(
+        select(plant_inv.c.id, plant_inv.c.plant_id, plant_inv.c.value).where(plant_inv.c.user_id == user_id).order_by(plant_inv.c.id)
+    )
+    return json.dumps([{
+        'id': row.id,
+        'plant_id': row.plant_id,
+        'name': BASE_PLANTS[row.plant_id - 1][0],
+        'value': row.value
+    } for row in rows])
+
+def read_stacks(connection, user_id):
+    """Build one player's inventory from plant_stack, like get_inv does"""
+    rows = connection.execute(
+        select(plant_stack.c.plant_id, plant_stack.c.histogram).where(plant_stack.c.user_id == user_id).order_by(plant_stack.c.plant_id)
+    )
+    return json.dumps([{
+        'id': entry_id(row.plant_id, value),
+        'plant_id': row.plant_id,
+        'name': BASE_PLANTS[row.plant_id - 1][0],
+        'value': value,
+        'count': count
+    } for row in rows for value, count in sorted(unpack_values(row.histogram).items())])
+
+def measure(engine, read, user_id, repeat):
+    """Get (response bytes, best time in seconds, peak Python memory in bytes) of a read"""
+    with engine.connect() as connection:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = read(connection, user_id)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        read(connection, user_id)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return len(body), best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare plant inventories stored one row per plant and stacked per plant type")
+    parser.add_argument('--players', type=int, default=20, help="Players to fill (default: 20)")
+    parser.add_argument('--plants', type=int, default=10000, help="Plants per player (default: 10000)")
+    parser.add_argument('--repeat', type=int, default=5, help="Times each inventory read is timed (default: 5)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    inventories = {f'{i:036d}': roll_inventory(rng, args.plants) for i in range(args.players)}
+    user_id = next(iter(inventories))
+
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    try:
+        engine = create_engine(f'sqlite:///{database.name}')
+        metadata.create_all(engine)
+        rows = fill(engine, inventories)
+        with engine.connect() as connection:
+            connection.exec_driver_sql('VACUUM')
+
+        print(f'{args.players} players with {args.plants} plants each\n')
+        print(f'{"":<28}{"plant_inv":>14}{"plant_stack":>14}{"saving":>10}')
+
+        def line(name, old, new, unit=''):
+            print(f'{name:<28}{old:>14,.0f}{new:>14,.0f}{(1 - new / old) * 100 if old else 0:>9.1f}%  {unit}'.rstrip())
+
+        line('rows', rows['plant_inv'], rows['plant_stack'])
+        line('table + index size', table_bytes(engine, 'plant_inv'), table_bytes(engine, 'plant_stack'), 'bytes')
+
+        old_size, old_time, old_peak = measure(engine, read_rows, user_id, args.repeat)
+        new_size, new_time, new_peak = measure(engine, read_stacks, user_id, args.repeat)
+        line('inventory response', old_size, new_size, 'bytes')
+        line('inventory peak memory', old_peak, new_peak, 'bytes')
+        line('inventory build time', old_time * 10 ** 6, new_time * 10 ** 6, 'us')
+        engine.dispose()
+    finally:
+        os.unlink(database.name)
+
+if __name__ == "__main__":
+    main()
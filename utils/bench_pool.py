@@ -0,0 +1,132 @@
+from pathlib import Path
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Hot endpoints in routes/game.py (method, URL, JSON body)
+HOT_ENDPOINTS = [
+    ('GET', '/api/inventory', None),
+    ('GET', '/api/plants/growing', None),
+    ('GET', '/api/user/balance', None),
+    ('GET', '/api/shop/items', None),
+    ('POST', '/api/shop/buy', {'seed_id': 1, 'quantity': 1}),
+]
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def make_players(app, count):
+    """Register and log in benchmark Users, returns their test clients"""
+    from models.database import db
+    from models.user import User
+
+    players = []
+    for i in range(count):
+        name = f'bench{i}'
+        client = app.test_client()
+        client.post('/register', data={
+            'email': f'{name}@example.com',
+            'username': name,
+            'password': 'password1',
+            'confirm_password': 'password1'
+        })
+        client.post('/login', data={'email': f'{name}@example.com', 'password': 'password1'})
+        players.append(client)
+
+    # Enough money to keep buying
+    with app.app_context():
+        db.session.execute(db.update(User).where(User.username.like('bench%')).values(currency=10 ** 9))
+        db.session.commit()
+    return players
+
+def run_profile(pool, requests, concurrency):
+    """Time the hot endpoints with one pool profile, returns ({endpoint: [seconds]}, pool stats)"""
+    import eventlet
+    from app import create_app
+    from config import config
+    from models.database import db
+    from models.db_pool import engine_options, pool_stats
+
+    config[os.environ['FLASK_ENV']].SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool)
+    app = create_app(start_services=False)
+    players = make_players(app, concurrency)
+
+    timings = {f'{method} {url}': [] for method, url, _ in HOT_ENDPOINTS}
+
+    def play(client):
+        for _ in range(requests // concurrency):
+            for method, url, body in HOT_ENDPOINTS:
+                start = time.perf_counter()
+                response = client.open(url, method=method, json=body)
+                timings[f'{method} {url}'].append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{method} {url} returned {response.status_code}')
+
+    green_pool = eventlet.GreenPool(concurrency)
+    for _ in green_pool.imap(play, players):
+        pass
+
+    with app.app_context():
+        stats = pool_stats(db.engine)
+        db.engine.dispose()
+    return timings, stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare database pool profiles on the hot game endpoints")
+    parser.add_argument('--database-url', help="Database to benchmark against (default: temporary SQLite file)")
+    parser.add_argument('--pools', default='null,queue', help="Pool profiles to compare (default: null,queue)")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint (default: 200)")
+    parser.add_argument('--concurrency', type=int, default=10, help="Simultaneous players (default: 10)")
+    args = parser.parse_args()
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+
+    # Must be set before the config is imported
+    os.environ.setdefault('FLASK_ENV', 'development')
+    os.environ.setdefault('SECRET_KEY', 'bench-pool')
+    os.environ['DEV_DATABASE_URL'] = args.database_url
+    if os.environ['FLASK_ENV'] == 'production':
+        os.environ['DATABASE_URL'] = args.database_url
+
+    try:
+        results = {}
+        for pool in args.pools.split(','):
+            results[pool] = run_profile(pool, args.requests, args.concurrency)
+    finally:
+        if database:
+            os.unlink(database.name)
+
+    print(f'\n{args.requests} requests per endpoint, {args.concurrency} players, {args.database_url}\n')
+    print(f'{"endpoint":<28}{"pool":<8}{"p50 ms":>10}{"p95 ms":>10}{"mean ms":>10}')
+    for method, url, _ in HOT_ENDPOINTS:
+        endpoint = f'{method} {url}'
+        for pool, (timings, _) in results.items():
+            times = timings[endpoint]
+            print(f'{endpoint:<28}{pool:<8}'
+                  f'{percentile(times, 0.5) * 1000:>10.2f}'
+                  f'{percentile(times, 0.95) * 1000:>10.2f}'
+                  f'{statistics.mean(times) * 1000:>10.2f}')
+
+    print('\nPool statistics:')
+    for pool, (_, stats) in results.items():
+        print(f'  {pool}: {stats["checkouts"]} checkouts, '
+              f'avg wait {stats["avg_wait"] * 1000:.3f} ms, max wait {stats["max_wait"] * 1000:.3f} ms, '
+              f'most in use {stats["max_in_use"]}, timeouts {stats["timeouts"]}')
+
+if __name__ == "__main__":
+    main()
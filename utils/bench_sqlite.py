@@ -0,0 +1,97 @@
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import create_engine, exc, insert, select, func, MetaData, Table, Column, Integer, String
+from models.sqlite_tuning import SQLITE_PROFILES, tune_sqlite, sqlite_settings
+
+metadata = MetaData()
+bench = Table(
+    'bench', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('room_id', Integer, nullable=False, index=True),
+    Column('message_content', String(500), nullable=False)
+)
+
+def make_engine(path, profile):
+    # No Python-level busy timeout, so only the profile's PRAGMA applies
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 0})
+    tune_sqlite(engine, SQLITE_PROFILES[profile])
+    metadata.create_all(engine)
+    return engine
+
+def commit_throughput(engine, commits):
+    """Commits per second, one small insert per transaction (like a socket event)"""
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        for i in range(commits):
+            connection.execute(insert(bench), {'room_id': i % 10, 'message_content': 'hello'})
+            connection.commit()
+    return commits / (time.perf_counter() - start)
+
+def batch_throughput(engine, rows, batch_size):
+    """Rows per second inserted in batches (like the chat buffer)"""
+    start = time.perf_counter()
+    with engine.connect() as connection:
+        for i in range(0, rows, batch_size):
+            connection.execute(insert(bench), [{'room_id': j % 10, 'message_content': 'hello'} for j in range(batch_size)])
+            connection.commit()
+    return rows / (time.perf_counter() - start)
+
+def write_during_read(engine):
+    """Check a commit succeeds while another connection has a read transaction open"""
+    with engine.connect() as reader, engine.connect() as writer:
+        reader.exec_driver_sql('BEGIN')
+        reader.execute(select(func.count()).select_from(bench)).scalar()
+        try:
+            writer.exec_driver_sql('PRAGMA busy_timeout = 0') # Fail straight away instead of waiting
+            writer.execute(insert(bench), {'room_id': 0, 'message_content': 'hello'})
+            writer.commit()
+            return True
+        except exc.OperationalError:
+            writer.rollback()
+            return False
+        finally:
+            reader.rollback()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite commit throughput before and after tuning")
+    parser.add_argument('--commits', type=int, default=500, help="Single-row commits (default: 500)")
+    parser.add_argument('--rows', type=int, default=20000, help="Rows for the batch test (default: 20000)")
+    parser.add_argument('--batch-size', type=int, default=200, help="Rows per batch (default: 200)")
+    parser.add_argument('--dir', help="Directory for the test databases (default: system temp, use the real disk for fair numbers)")
+    args = parser.parse_args()
+
+    results = {}
+    for profile in ('default', 'tuned'):
+        with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+            engine = make_engine(os.path.join(directory, 'bench.db'), profile)
+            results[profile] = {
+                'settings': sqlite_settings(engine),
+                'commits': commit_throughput(engine, args.commits),
+                'batched': batch_throughput(engine, args.rows, args.batch_size),
+                'write_during_read': write_during_read(engine)
+            }
+            engine.dispose()
+
+    print(f'\n{"":<36}{"default":>12}{"tuned":>12}')
+    for name in ('journal_mode', 'synchronous'):
+        print(f'{name:<36}{results["default"]["settings"][name]:>12}{results["tuned"]["settings"][name]:>12}')
+    print(f'{"commits/s (1 row per commit)":<36}{results["default"]["commits"]:>12.0f}{results["tuned"]["commits"]:>12.0f}')
+    print(f'{f"rows/s ({args.batch_size} rows per commit)":<36}{results["default"]["batched"]:>12.0f}{results["tuned"]["batched"]:>12.0f}')
+    print(f'{"commit while a read is open":<36}'
+          f'{"OK" if results["default"]["write_during_read"] else "LOCKED":>12}'
+          f'{"OK" if results["tuned"]["write_during_read"] else "LOCKED":>12}')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from sqlalchemy import create_engine, text
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from models.plant_stack import pack_values, entry_id
+
+# Reuse the worker launcher from the scale-out check
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from check_scale_out import free_port, start_worker
+
+SEED_ID = 1
+PLANT_ID = 1
+PLANT_VALUE = 10
+
+def fire(calls):
+    """Run calls all at once from separate threads, returning their results in order"""
+    barrier = threading.Barrier(len(calls))
+
+    def run(call):
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            response = call()
+            ok = response.status_code == 200
+            body = response.json() if ok else {}
+        except requests.RequestException:
+            ok, body = False, {}
+        return ok, body, time.perf_counter() - start
+
+    with ThreadPoolExecutor(len(calls)) as executor:
+        return list(executor.map(run, calls))
+
+class LockWatcher(threading.Thread):
+    """Sample PostgreSQL for sessions waiting on a lock
+
+    Nothing is locked before it is read, so only conditional UPDATEs of the
+    same row (the balance, or a plant stack) wait for each other to commit"""
+
+    def __init__(self, engine):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.running = True
+        self.max_waiting = 0
+        self.phases = {} # phase --> most sessions waiting at once
+
+    def run(self):
+        with self.engine.connect() as connection:
+            while self.running:
+                waiting = connection.execute(text('SELECT count(*) FROM pg_locks WHERE NOT granted')).scalar()
+                connection.rollback()
+                self.max_waiting = max(self.max_waiting, waiting)
+                time.sleep(0.005)
+
+    def end_phase(self, name):
+        self.phases[name] = self.max_waiting
+        self.max_waiting = 0
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self.phases
+
+def main():
+    parser = argparse.ArgumentParser(description="Check concurrent buys, sells and harvests from one account can't lose updates")
+    parser.add_argument('--workers', type=int, default=4, help="Worker processes to spread requests over (default: 4)")
+    parser.add_argument('--buys', type=int, default=100, help="Parallel buys (default: 100)")
+    parser.add_argument('--database-url', help="Database to use (default: fresh temporary SQLite file)")
+    args = parser.parse_args()
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+
+    env = dict(
+        os.environ,
+        FLASK_ENV='development',
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'atomic-currency'),
+        DEV_DATABASE_URL=args.database_url
+    )
+
+    workers = []
+    results = []
+    try:
+        # Started one at a time, so only the first creates the schema
+        for number in range(args.workers):
+            workers.append(start_worker(number + 1, free_port(), env))
+        urls = [url for _, url in workers]
+        engine = create_engine(args.database_url)
+
+        # One account, logged in once (the session cookie works on every worker)
+        session = requests.Session()
+        session.post(urls[0] + '/register', data={
+            'email': 'buyer@example.com',
+            'username': 'buyer',
+            'password': 'password1',
+            'confirm_password': 'password1'
+        })
+        session.post(urls[0] + '/login', data={'email': 'buyer@example.com', 'password': 'password1'})
+        cookies = session.cookies.get_dict()
+
+        def post(number, path, json):
+            return lambda: requests.post(urls[number % len(urls)] + path, json=json, cookies=cookies, timeout=60)
+
+        # Enough money for only some of the buys
+        affordable = args.buys * 3 // 5
+        with engine.begin() as connection:
+            cost = connection.execute(text('SELECT cost FROM seed WHERE id = :id'), {'id': SEED_ID}).scalar()
+            user_id = connection.execute(text('SELECT id FROM "user" WHERE username = :name'), {'name': 'buyer'}).scalar()
+            connection.execute(text('UPDATE "user" SET currency = :currency WHERE id = :id'), {'currency': cost * affordable, 'id': user_id})
+
+        watcher = LockWatcher(engine) if engine.dialect.name == 'postgresql' else None
+        if watcher:
+            watcher.start()
+
+        # Buys
+        buys = fire([post(i, '/api/shop/buy', {'seed_id': SEED_ID, 'quantity': 1}) for i in range(args.buys)])
+        bought = sum(body.get('success', False) for _, body, _ in buys)
+        if watcher:
+            watcher.end_phase('buys')
+        with engine.connect() as connection:
+            balance = connection.execute(text('SELECT currency FROM "user" WHERE id = :id'), {'id': user_id}).scalar()
+            seeds = connection.execute(text(
+                'SELECT quantity FROM user_seed_inv WHERE user_id = :id AND seed_id = :seed_id'
+            ), {'id': user_id, 'seed_id': SEED_ID}).scalar() or 0
+
+        results.append((all(ok for ok, _, _ in buys), f'{args.buys} parallel buys all got a response'))
+        results.append((bought == affordable, f'{bought} buys succeeded, {affordable} were affordable'))
+        results.append((balance == cost * (affordable - bought) and balance >= 0, f'balance is {balance}, expected {cost * (affordable - bought)}'))
+        results.append((seeds == bought, f'{seeds} seeds in inventory for {bought} successful buys'))
+
+        # Sells from one stack of identical plants, with twice as many sells as plants
+        plants = args.buys // 2
+        with engine.begin() as connection:
+            connection.execute(text(
+                'INSERT INTO plant_stack (user_id, plant_id, count, histogram) VALUES (:user_id, :plant_id, :count, :histogram)'
+            ), {'user_id': user_id, 'plant_id': PLANT_ID, 'count': plants, 'histogram': pack_values(Counter({PLANT_VALUE: plants}))})
+        inv_entry_id = entry_id(PLANT_ID, PLANT_VALUE)
+        sells = fire([post(i, '/api/shop/sell', {'inv_entry_id': inv_entry_id}) for i in range(plants * 2)])
+        sold = sum(body.get('success', False) for _, body, _ in sells)
+        if watcher:
+            watcher.end_phase('sells')
+        with engine.connect() as connection:
+            new_balance = connection.execute(text('SELECT currency FROM "user" WHERE id = :id'), {'id': user_id}).scalar()
+            left = connection.execute(text('SELECT COALESCE(SUM(count), 0) FROM plant_stack WHERE user_id = :id'), {'id': user_id}).scalar()
+
+        results.append((all(ok for ok, _, _ in sells), f'{len(sells)} parallel sells all got a response'))
+        results.append((sold == plants and left == 0, f'{sold} sells succeeded for {plants} plants, {left} left'))
+        results.append((new_balance - balance == sold * PLANT_VALUE, f'balance went up {new_balance - balance}, expected {sold * PLANT_VALUE}'))
+
+        # Harvests, with every ready plant harvested by several requests at once
+        with engine.begin() as connection:
+            connection.execute(text(
+                'INSERT INTO growing_plant (user_id, seed_id, planted_at, growth_time, ready_at, is_ready) '
+                'VALUES (:user_id, :seed_id, :ready_at, 0, :ready_at, :is_ready)'
+            ), [{'user_id': user_id, 'seed_id': SEED_ID, 'ready_at': datetime(2000, 1, 1), 'is_ready': False} for _ in range(plants)])
+        harvests = fire([post(i, '/api/plants/harvest-all', {}) for i in range(len(workers) * 5)])
+        harvested = [plant_id for _, body, _ in harvests for plant_id in body.get('harvested', [])]
+        if watcher:
+            watcher.end_phase('harvests')
+        with engine.connect() as connection:
+            stacked = connection.execute(text('SELECT COALESCE(SUM(count), 0) FROM plant_stack WHERE user_id = :id'), {'id': user_id}).scalar()
+
+        results.append((all(ok for ok, _, _ in harvests), f'{len(harvests)} parallel harvests all got a response'))
+        results.append((len(harvested) == len(set(harvested)) == plants, f'{len(harvested)} plants harvested ({len(set(harvested))} different) of {plants} ready'))
+        results.append((stacked == plants, f'{stacked} plants in inventory for {plants} harvested'))
+
+        latencies = sorted(elapsed for _, _, elapsed in buys + sells + harvests)
+        print(f'Latency over {len(latencies)} requests: p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, '
+              f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms')
+        if watcher:
+            waits = ', '.join(f'{phase} {waiting}' for phase, waiting in watcher.stop().items())
+            print(f'Most sessions waiting on a lock at once: {waits}')
+        engine.dispose()
+    finally:
+        for process, _ in workers:
+            process.terminate()
+            process.wait()
+        if database:
+            os.unlink(database.name)
+
+    print()
+    for ok, message in results:
+        print(f'[{"OK" if ok else "FAIL"}] {message}')
+    failed = sum(not ok for ok, _ in results)
+    print(f'\n{len(results) - failed}/{len(results)} checks passed.')
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import app # Monkey patches eventlet and makes psycopg2 green
+import eventlet
+from sqlalchemy import create_engine, text
+from models.db_pool import engine_options
+from models.green_db import green_db_status, eventlet_wait_callback, psycopg2_url
+
+def slow_queries(engine, count, seconds):
+    """Run slow queries from concurrent green threads
+
+    Returns (elapsed seconds, heartbeat ticks) - a frozen hub can't tick"""
+    ticks = 0
+    running = True
+
+    def heartbeat():
+        nonlocal ticks
+        while running:
+            ticks += 1
+            eventlet.sleep(0.05)
+
+    def query(_):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT pg_sleep(:seconds)'), {'seconds': seconds})
+
+    # Open the connections first so only the queries are timed
+    connections = [engine.connect() for _ in range(count)]
+    for connection in connections:
+        connection.close()
+
+    beat = eventlet.spawn(heartbeat)
+    start = time.perf_counter()
+    for _ in eventlet.GreenPool(count).imap(query, range(count)):
+        pass
+    elapsed = time.perf_counter() - start
+    running = False
+    beat.wait()
+    return elapsed, ticks
+
+def main():
+    parser = argparse.ArgumentParser(description="Check slow PostgreSQL queries overlap under eventlet")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'), help="PostgreSQL URL (default: $DATABASE_URL)")
+    parser.add_argument('--seconds', type=float, default=1.0, help="Length of each slow query (default: 1)")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith('postgres'):
+        parser.error('a PostgreSQL --database-url (or DATABASE_URL) is required')
+
+    from psycopg2 import extensions
+
+    # The green wait callback is for psycopg2
+    engine = create_engine(psycopg2_url(args.database_url), **engine_options('queue'))
+
+    status = green_db_status(engine)
+    print(f'Driver: {status["driver"]}, monkey patched: {status["monkey_patched"]}, green: {status["green"]}\n')
+
+    # Green driver: two queries should take about as long as one
+    green_elapsed, green_ticks = slow_queries(engine, 2, args.seconds)
+
+    # Blocking driver for comparison: the queries (and heartbeat) queue up
+    engine.dispose()
+    extensions.set_wait_callback(None)
+    blocking_elapsed, blocking_ticks = slow_queries(engine, 2, args.seconds)
+    extensions.set_wait_callback(eventlet_wait_callback)
+    engine.dispose()
+
+    print(f'Green:    2 x {args.seconds}s queries took {green_elapsed:.2f}s, heartbeat ticked {green_ticks} times')
+    print(f'Blocking: 2 x {args.seconds}s queries took {blocking_elapsed:.2f}s, heartbeat ticked {blocking_ticks} times\n')
+
+    overlapped = status['green'] and green_elapsed < args.seconds * 1.5
+    print(f'[{"OK" if overlapped else "FAIL"}] slow queries overlap instead of running one after another')
+    sys.exit(0 if overlapped else 1)
+
+if __name__ == "__main__":
+    main()
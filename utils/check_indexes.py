@@ -0,0 +1,106 @@
+from pathlib import Path
+from datetime import datetime, timezone
+import sys
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import create_app
+from models.database import db
+from models.user import User
+from models.room import Room
+from models.seed_inv import SeedInv
+from models.plant_stack import PlantStack
+from models.chat_message import ChatMessage
+from models.growing_plant import GrowingPlant
+from models.user_plant_record import UserPlantRecord
+
+USER_ID = '00000000-0000-0000-0000-000000000000'
+NOW = datetime.now(timezone.utc)
+
+# Hot queries made by routes/ and sockets/ (name, table that must be read by index, statement)
+HOT_QUERIES = [
+    ('login: user by email', 'user',
+        db.select(User).where(User.email == 'player@example.com')),
+    ('register: user by username', 'user',
+        db.select(User).where(User.username == 'player')),
+    ('get_inv: seeds', 'user_seed_inv',
+        db.select(SeedInv.seed_id, SeedInv.quantity).where(SeedInv.user_id == USER_ID)),
+    ('get_inv: plants', 'plant_stack',
+        db.select(PlantStack.plant_id, PlantStack.histogram).where(PlantStack.user_id == USER_ID)),
+    ('add_seed: seed inventory entry', 'user_seed_inv',
+        db.select(SeedInv).where(SeedInv.user_id == USER_ID, SeedInv.seed_id == 1)),
+    ('get_growing: growing plants', 'growing_plant',
+        db.select(GrowingPlant.id, GrowingPlant.ready_at).where(GrowingPlant.user_id == USER_ID).order_by(GrowingPlant.ready_at)),
+    ('harvest_all: ready plants', 'growing_plant',
+        db.select(GrowingPlant).where(GrowingPlant.user_id == USER_ID, GrowingPlant.ready_at <= NOW)),
+    ('growth scheduler: refill', 'growing_plant',
+        db.select(GrowingPlant.id, GrowingPlant.user_id, GrowingPlant.ready_at).where(GrowingPlant.ready_at <= NOW, GrowingPlant.is_ready.is_not(True))),
+    ('harvest: plant record', 'user_plant_record',
+        db.select(UserPlantRecord).where(UserPlantRecord.user_id == USER_ID, UserPlantRecord.plant_id.in_([1, 2, 3]))),
+    ('rooms: room members', 'user',
+        db.select(User).where(User.room_id == 1)),
+    ('list_rooms: member counts', 'user',
+        db.select(User.room_id, db.func.count(User.id)).where(User.room_id.isnot(None)).group_by(User.room_id)),
+    ('join_room: room by join code', 'room',
+        db.select(Room).where(Room.join_code == 'ABCD')),
+    ('chat: room history', 'chat_message',
+        db.select(ChatMessage).where(ChatMessage.room_id == 1).order_by(ChatMessage.timestamp.desc()).limit(50)),
+]
+
+def explain(statement):
+    """Get the database's query plan for a statement"""
+    connection = db.session.connection()
+    dialect = db.engine.dialect
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+
+    if dialect.name == 'sqlite':
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params).all()
+    else:
+        rows = connection.exec_driver_sql('EXPLAIN ' + str(compiled), compiled.params).all()
+    return [str(row[-1]) for row in rows]
+
+def uses_index(plan, table):
+    """Check a query plan never reads the whole table"""
+    for line in plan:
+        line = line.strip()
+        # SQLite: 'SCAN table' without an index is a full table scan
+        if line.startswith(f'SCAN {table}') and 'INDEX' not in line:
+            return False
+        # PostgreSQL
+        if f'Seq Scan on {table} ' in line + ' ':
+            return False
+    return True
+
+def main():
+    app = create_app(start_services=False)
+    failed = 0
+
+    with app.app_context():
+        # Tables are tiny outside production, so make Postgres
+        # show whether an index *can* be used
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+
+        for name, table, statement in HOT_QUERIES:
+            plan = explain(statement)
+            ok = uses_index(plan, table)
+            failed += not ok
+
+            print(f'[{"OK" if ok else "FAIL"}] {name}')
+            if not ok:
+                for line in plan:
+                    print(f'    {line}')
+
+        db.session.rollback()
+
+    print(f'\n{len(HOT_QUERIES) - failed}/{len(HOT_QUERIES)} hot queries use an index.')
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+from collections import Counter
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Inventory, growing plant, chat message and room rows per fixture
+SIZES = (1, 10, 1000)
+
+# Most SQL statements each route and socket event may make (in the order they are run,
+# as later ones change the fixture). Counts must also stay the same at every fixture size.
+BUDGETS = {
+    'GET /': 1,
+    'GET /rooms': 1,
+    'GET /rooms/<id>': 3,
+    'GET /api/rooms/list': 1,
+    'GET /api/rooms/search': 2,
+    'GET /api/rooms/<id>/messages': 2,
+    'GET /api/inventory': 3,
+    'GET /api/inventory/plants': 2,
+    'GET /api/inventory/plants (stream)': 2,
+    'GET /api/inventory/seeds': 2,
+    'GET /api/inventory/seeds (stream)': 2,
+    'GET /api/plants/growing': 2,
+    'GET /api/user/balance': 1,
+    'GET /api/shop/items': 1,
+    'GET /api/shop/items/<id>': 1,
+    'POST /api/shop/buy': 6,
+    'POST /api/shop/sell': 8, # Stacks are saved inside a SAVEPOINT (and RELEASE)
+    'POST /api/shop/sell-bulk (IDs)': 9, # Emptied and partly sold stacks
+    'POST /api/shop/sell-bulk (rarity)': 8,
+    'POST /api/plants/plant-seed': 8,
+    'POST /api/plants/<id>/harvest': 10,
+    'POST /api/plants/harvest-all': 9,
+    'GET /api/scheduler/stats': 1,
+    'GET /api/db/stats': 1,
+    'GET /metrics': 1,
+    'socket connect': 2,
+    'socket join': 2, # Snapshot reads the room's members
+    'socket chat': 3, # Saved straight away, as the chat buffer isn't running
+    'socket leave': 0,
+    'socket disconnect': 0,
+    'POST /api/rooms/join': 6,
+    'POST /rooms/create': 5,
+    'POST /register': 3,
+    'POST /login': 2,
+    'GET /logout': 1,
+    'POST /api/rooms/<id>/leave': 9,
+}
+
+@contextlib.contextmanager
+def count_statements(engine):
+    """Collect the SQL statements run inside the block"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+class Fixture:
+    """Players and rooms with size rows of everything that grows in play"""
+
+    def __init__(self, app, size):
+        from models.database import db
+        from models.user import User
+        from models.room import Room
+        from models.seed_inv import SeedInv
+        from models.plant_stack import PlantStack, pack_values, entry_id
+        from models.growing_plant import GrowingPlant
+        from models.chat_message import ChatMessage
+        from models.user_plant_record import UserPlantRecord
+        from models.catalog import get_catalog
+
+        self.app = app
+        self.size = size
+        now = datetime.now(timezone.utc)
+
+        with app.app_context():
+            catalog = get_catalog()
+
+            def add_user(name, **values):
+                user = User(username=name, email=f'{name}@example.com', currency=10 ** 7, **values)
+                user.hash_password('password1')
+                db.session.add(user)
+                db.session.flush()
+                return user
+
+            owner = add_user(f'owner{size}', is_admin=True)
+            host = add_user(f'host{size}')
+            self.loner = add_user(f'loner{size}').email
+            self.creator = add_user(f'creator{size}').email
+            self.owner = owner.email
+
+            # The owner's room, with up to 10 members
+            room = Room(f'Budget {size}', False, 10, None)
+            room.owner = owner
+            db.session.add(room)
+            db.session.flush()
+            owner.room_id = room.id
+            for i in range(min(size, 10) - 1):
+                add_user(f'member{size}_{i}', room_id=room.id)
+            self.room_id = room.id
+
+            # Other rooms for the directory (the loner joins the first)
+            db.session.execute(db.insert(Room), [
+                {'name': f'Room {size}-{i}', 'is_private': False, 'max_members': 10, 'owner_id': host.id}
+                for i in range(size)
+            ])
+            self.open_room_id = db.session.query(Room.id).filter(Room.owner_id == host.id).order_by(Room.id).limit(1).scalar()
+
+            seeds = list(catalog.seeds)
+            plants = list(catalog.plants)
+            db.session.execute(db.insert(SeedInv), [
+                {'user_id': owner.id, 'seed_id': seed_id, 'quantity': size}
+                for seed_id in seeds[:size]
+            ])
+            # Plants with different values (so one entry each), two extra of the
+            # first plant so each sell route has some left to sell
+            stacks = {}
+            for i in range(size + 2):
+                stacks.setdefault(plants[i % len(plants) if i >= 3 else 0], Counter())[10 + i] += 1
+            self.plant_inv_ids = [entry_id(plant_id, value) for plant_id, values in sorted(stacks.items()) for value in sorted(values)]
+            # One of every other plant too, so harvests only add to existing stacks
+            for plant_id in plants:
+                stacks.setdefault(plant_id, Counter({1: 1}))
+            db.session.execute(db.insert(PlantStack), [
+                {'user_id': owner.id, 'plant_id': plant_id, 'count': values.total(), 'histogram': pack_values(values)}
+                for plant_id, values in stacks.items()
+            ])
+            self.rarity = catalog.plants[plants[0]].rarity
+            # Every plant already discovered, so harvests only update records
+            db.session.execute(db.insert(UserPlantRecord), [
+                {'user_id': owner.id, 'plant_id': plant_id, 'times_grown': 1, 'first_discovered': now, 'last_grown': now}
+                for plant_id in plants
+            ])
+            # Fully grown (one extra for harvesting a single plant first)
+            db.session.execute(db.insert(GrowingPlant), [
+                {'user_id': owner.id, 'seed_id': seeds[i % len(seeds)], 'growth_time': 30,
+                 'planted_at': now - timedelta(hours=1), 'ready_at': now - timedelta(minutes=30)}
+                for i in range(size + 1)
+            ])
+            db.session.execute(db.insert(ChatMessage), [
+                {'id': size * 10 ** 6 + i, 'message_content': 'hello', 'room_id': room.id,
+                 'user_id': owner.id, 'timestamp': now - timedelta(seconds=size - i)}
+                for i in range(size)
+            ])
+            db.session.commit()
+
+            self.growing_id = db.session.query(GrowingPlant.id).filter(GrowingPlant.user_id == owner.id).limit(1).scalar()
+
+    def client(self, email):
+        client = self.app.test_client()
+        client.post('/login', data={'email': email, 'password': 'password1'})
+        return client
+
+def cases(fixture):
+    """Get (name, call) for every route and socket event"""
+    from app import socketio
+
+    owner = fixture.client(fixture.owner)
+    loner = fixture.client(fixture.loner)
+    creator = fixture.client(fixture.creator)
+    socket = None
+    room = fixture.room_id
+
+    def connect():
+        nonlocal socket
+        socket = socketio.test_client(fixture.app, flask_test_client=owner)
+
+    return [
+        ('GET /', lambda: owner.get('/')),
+        ('GET /rooms', lambda: owner.get('/rooms')),
+        ('GET /rooms/<id>', lambda: owner.get(f'/rooms/{room}')),
+        ('GET /api/rooms/list', lambda: owner.get('/api/rooms/list')),
+        ('GET /api/rooms/search', lambda: owner.get('/api/rooms/search')),
+        ('GET /api/rooms/<id>/messages', lambda: owner.get(f'/api/rooms/{room}/messages')),
+        ('GET /api/inventory', lambda: owner.get('/api/inventory')),
+        ('GET /api/inventory/plants', lambda: owner.get('/api/inventory/plants?sort=value&order=desc')),
+        ('GET /api/inventory/plants (stream)', lambda: owner.get('/api/inventory/plants?format=ndjson').data), # Streamed while read
+        ('GET /api/inventory/seeds', lambda: owner.get('/api/inventory/seeds?sort=name')),
+        ('GET /api/inventory/seeds (stream)', lambda: owner.get('/api/inventory/seeds?format=ndjson').data),
+        ('GET /api/plants/growing', lambda: owner.get('/api/plants/growing')),
+        ('GET /api/user/balance', lambda: owner.get('/api/user/balance')),
+        ('GET /api/shop/items', lambda: owner.get('/api/shop/items')),
+        ('GET /api/shop/items/<id>', lambda: owner.get('/api/shop/items/1')),
+        # Harvested before selling, so every harvested plant adds to a stack
+        ('POST /api/plants/plant-seed', lambda: owner.post('/api/plants/plant-seed', json={'seed_id': 1})),
+        ('POST /api/plants/<id>/harvest', lambda: owner.post(f'/api/plants/{fixture.growing_id}/harvest')),
+        ('POST /api/plants/harvest-all', lambda: owner.post('/api/plants/harvest-all')),
+        ('POST /api/shop/buy', lambda: owner.post('/api/shop/buy', json={'seed_id': 1, 'quantity': 2})),
+        ('POST /api/shop/sell', lambda: owner.post('/api/shop/sell', json={'inv_entry_id': fixture.plant_inv_ids[0]})),
+        ('POST /api/shop/sell-bulk (IDs)', lambda: owner.post('/api/shop/sell-bulk', json={'inv_entry_ids': fixture.plant_inv_ids[1::2]})),
+        ('POST /api/shop/sell-bulk (rarity)', lambda: owner.post('/api/shop/sell-bulk', json={'rarity': fixture.rarity})),
+        ('GET /api/scheduler/stats', lambda: owner.get('/api/scheduler/stats')),
+        ('GET /api/db/stats', lambda: owner.get('/api/db/stats')),
+        ('GET /metrics', lambda: owner.get('/metrics')),
+        ('socket connect', connect),
+        ('socket join', lambda: socket.emit('join', {'room_id': str(room)})),
+        ('socket chat', lambda: socket.emit('chat', {'room_id': room, 'message': 'hello'})),
+        ('socket leave', lambda: socket.emit('leave', {'room_id': room})),
+        ('socket disconnect', lambda: socket.disconnect()),
+        ('POST /api/rooms/join', lambda: loner.post('/api/rooms/join', json={'room_id': fixture.open_room_id})),
+        ('POST /rooms/create', lambda: creator.post('/rooms/create', data={'name': 'New room', 'max_members': '10'})),
+        ('POST /register', lambda: fixture.app.test_client().post('/register', data={
+            'email': f'new{fixture.size}@example.com',
+            'username': f'new{fixture.size}',
+            'password': 'password1',
+            'confirm_password': 'password1'
+        })),
+        ('POST /login', lambda: fixture.app.test_client().post('/login', data={'email': fixture.owner, 'password': 'password1'})),
+        ('GET /logout', lambda: loner.get('/logout')),
+        ('POST /api/rooms/<id>/leave', lambda: owner.post(f'/api/rooms/{room}/leave')),
+    ]
+
+def warm_caches(app):
+    """Fill the catalog and room directory so counts are the steady state"""
+    from models.catalog import get_catalog
+    from models.room_directory import get_directory, invalidate_directory
+
+    with app.app_context():
+        get_catalog()
+        invalidate_directory()
+        get_directory()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every route and socket event stays within its SQL statement budget")
+    parser.add_argument('--database-url', help="Database to use (default: fresh temporary SQLite file)")
+    parser.add_argument('--verbose', action='store_true', help="Print the statements of failing checks")
+    args = parser.parse_args()
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+
+    # Must be set before the config is imported
+    os.environ.setdefault('FLASK_ENV', 'development')
+    os.environ.setdefault('SECRET_KEY', 'query-budget')
+    os.environ['DEV_DATABASE_URL'] = args.database_url
+
+    try:
+        from app import create_app
+        from models.database import db
+        import models.catalog
+        import models.room_directory
+
+        # Caches never expire during the check, so only writes refill them
+        models.catalog.VERSION_CHECK_INTERVAL = float('inf')
+        models.room_directory.SNAPSHOT_TTL = float('inf')
+
+        app = create_app(start_services=False)
+        with app.app_context():
+            engine = db.engine
+
+        random.seed(0) # Same loot rolls every run
+        counts = {} # name --> {size: statements}
+        statements = {} # name --> statements at the largest size
+        for size in SIZES:
+            fixture = Fixture(app, size)
+            for name, call in cases(fixture):
+                warm_caches(app)
+                with count_statements(engine) as run:
+                    call()
+                counts.setdefault(name, {})[size] = len(run)
+                statements[name] = run
+    finally:
+        if database:
+            os.unlink(database.name)
+
+    failed = 0
+    print(f'\n{"route / event":<41}{"budget":>8}' + ''.join(f'{f"{size} rows":>11}' for size in SIZES))
+    for name, by_size in counts.items():
+        budget = BUDGETS.get(name)
+        worst = max(by_size.values())
+        grows = by_size[SIZES[-1]] > by_size[SIZES[0]]
+        ok = budget is not None and worst <= budget and not grows
+        failed += not ok
+
+        print(f'[{"OK" if ok else "FAIL"}] {name:<36}{budget if budget is not None else "-":>8}'
+              + ''.join(f'{by_size[size]:>11}' for size in SIZES)
+              + ('  grows with data' if grows else '')
+              + ('  over budget' if budget is not None and worst > budget else '')
+              + ('  no budget declared' if budget is None else ''))
+        if not ok and args.verbose:
+            for statement, times in Counter(statements[name]).items():
+                print(f'    {times:>5} x {" ".join(statement.split())[:140]}')
+
+    print(f'\n{len(counts) - failed}/{len(counts)} routes and socket events are within budget.')
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
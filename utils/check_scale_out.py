@@ -0,0 +1,269 @@
+from pathlib import Path
+import argparse
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Needs the Socket.IO client extras: pip install "python-socketio[client]"
+import requests
+import socketio
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Start a worker without the reloader so it stays a single process
+WORKER = 'from app import create_app, socketio; app = create_app(); socketio.run(app, port={port}, use_reloader=False, log_output=False)'
+
+# An origin allowed by the development config's CORS_ORIGINS
+ORIGIN = 'http://127.0.0.1:5000'
+
+class StandInRedis(socketserver.ThreadingTCPServer):
+    """Minimal Redis stand-in that only supports pub/sub
+
+    Enough for Socket.IO's Redis message queue when no Redis server is
+    installed. Use a real Redis server (--message-queue) for anything else."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInRedisHandler)
+        self.subscribers = {} # channel --> set of handlers
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self.server_address[1]}/0?protocol=2' # Only speaks RESP2
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+class StandInRedisHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels = set()
+
+    def send(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_command(self):
+        """Read one RESP array of bulk strings"""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split() # Inline command
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    break
+                command = args[0].upper()
+
+                if command == b'SUBSCRIBE':
+                    for channel in args[1:]:
+                        with server.lock:
+                            server.subscribers.setdefault(channel, set()).add(self)
+                        self.channels.add(channel)
+                        self.send(b'*3\r\n' + bulk(b'subscribe') + bulk(channel) + b':%d\r\n' % len(self.channels))
+                elif command == b'UNSUBSCRIBE':
+                    for channel in args[1:] or list(self.channels):
+                        with server.lock:
+                            server.subscribers.get(channel, set()).discard(self)
+                        self.channels.discard(channel)
+                        self.send(b'*3\r\n' + bulk(b'unsubscribe') + bulk(channel) + b':%d\r\n' % len(self.channels))
+                elif command == b'PUBLISH':
+                    channel, message = args[1], args[2]
+                    with server.lock:
+                        subscribers = list(server.subscribers.get(channel, ()))
+                    for subscriber in subscribers:
+                        subscriber.send(b'*3\r\n' + bulk(b'message') + bulk(channel) + bulk(message))
+                    self.send(b':%d\r\n' % len(subscribers))
+                elif command == b'PING':
+                    self.send(b'+PONG\r\n')
+                else:
+                    self.send(b'+OK\r\n') # SELECT, CLIENT SETINFO, ...
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            with server.lock:
+                for channel in self.channels:
+                    server.subscribers.get(channel, set()).discard(self)
+
+def bulk(value):
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_worker(number, port, env):
+    """Start a worker process and wait until it accepts requests"""
+    env = dict(env, CHAT_WORKER_ID=str(number))
+    process = subprocess.Popen(
+        [sys.executable, '-c', WORKER.format(port=port)],
+        cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Worker {number} exited with code {process.returncode}')
+        try:
+            requests.get(url + '/login', timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'Worker {number} did not start')
+
+class Player:
+    """An HTTP session and Socket.IO connection to one worker"""
+
+    def __init__(self, url, name):
+        self.url = url
+        self.name = name
+        self.http = requests.Session()
+        self.http.post(url + '/register', data={
+            'email': f'{name}@example.com',
+            'username': name,
+            'password': 'password1',
+            'confirm_password': 'password1'
+        })
+        self.http.post(url + '/login', data={'email': f'{name}@example.com', 'password': 'password1'})
+
+        self.events = []
+        # Workers behind a load balancer share one public origin
+        self.sio = socketio.Client(websocket_extra_options={'origin': ORIGIN})
+        self.sio.on('*', lambda event, data=None: self.events.append((event, data)))
+
+    def connect(self):
+        cookies = '; '.join(f'{key}={value}' for key, value in self.http.cookies.items())
+        self.sio.connect(self.url, headers={'Cookie': cookies}, transports=['websocket'])
+
+    def wait_for(self, event, check=lambda data: True, timeout=5):
+        """Wait for an event matching check, returns its data (or None)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            for name, data in self.events:
+                if name == event and check(data):
+                    return data
+            time.sleep(0.05)
+        return None
+
+def run_checks(alice, bobby):
+    """Play a room across two workers, returns [(check, passed)]"""
+    results = []
+
+    # Alice creates a room on worker 1, Bobby joins it on worker 2
+    response = alice.http.post(alice.url + '/rooms/create', data={'name': 'Scale Out', 'max_members': '5'}, allow_redirects=False)
+    room_id = int(response.headers['Location'].rstrip('/').rsplit('/', 1)[1])
+    bobby.http.post(bobby.url + '/api/rooms/join', json={'room_id': room_id})
+
+    alice.connect()
+    alice.sio.emit('join', {'room_id': str(room_id)})
+    alice.wait_for('member_update')
+
+    bobby.connect()
+    bobby.sio.emit('join', {'room_id': str(room_id)})
+
+    joined = alice.wait_for('member_joined', lambda data: data['member']['username'] == bobby.name)
+    results.append(('member_joined reaches the other worker', joined is not None))
+
+    snapshot = bobby.wait_for('member_update')
+    names = {member['username'] for member in (snapshot or {}).get('members', [])}
+    results.append(('snapshot lists members on the other worker', names == {alice.name, bobby.name}))
+
+    bobby.sio.emit('chat', {'room_id': room_id, 'message': 'hello from worker 2'})
+    chat = alice.wait_for('chat', lambda data: data['message_content'] == 'hello from worker 2')
+    results.append(('chat from worker 2 reaches worker 1', chat is not None))
+
+    alice.sio.emit('chat', {'room_id': room_id, 'message': 'hello from worker 1'})
+    chat = bobby.wait_for('chat', lambda data: data['message_content'] == 'hello from worker 1')
+    results.append(('chat from worker 1 reaches worker 2', chat is not None))
+
+    bobby.sio.disconnect()
+    left = alice.wait_for('member_left', lambda data: data['id'] == (joined or {}).get('member', {}).get('id'))
+    results.append(('member_left (still in the room) reaches the other worker on disconnect', left is not None and left['in_room']))
+
+    # Both workers' chat buffers saved to the shared database
+    history = []
+    deadline = time.time() + 5
+    while time.time() < deadline and len(history) < 2:
+        time.sleep(0.3)
+        history = alice.http.get(f'{alice.url}/api/rooms/{room_id}/messages').json().get('messages', [])
+    results.append(('chat history has messages from both workers', len(history) == 2))
+
+    alice.sio.disconnect()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Socket.IO events fan out across two workers")
+    parser.add_argument('--message-queue', help="Message queue URL (default: built-in Redis stand-in)")
+    args = parser.parse_args()
+
+    broker = None
+    message_queue = args.message_queue
+    if not message_queue:
+        broker = StandInRedis().start()
+        message_queue = broker.url
+
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    env = dict(
+        os.environ,
+        FLASK_ENV='development',
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'scale-out-check'),
+        DEV_DATABASE_URL=f'sqlite:///{database.name}',
+        SOCKETIO_MESSAGE_QUEUE=message_queue,
+        SOCKETIO_CHANNEL=f'seedlings-check-{os.getpid()}'
+    )
+
+    workers = []
+    try:
+        # Start one at a time so only the first builds the database
+        worker_1, url_1 = start_worker(1, free_port(), env)
+        workers.append(worker_1)
+        worker_2, url_2 = start_worker(2, free_port(), env)
+        workers.append(worker_2)
+        print(f'Workers at {url_1} and {url_2}, message queue {message_queue}\n')
+
+        results = run_checks(Player(url_1, 'alice'), Player(url_2, 'bobby'))
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.wait()
+        if broker:
+            broker.shutdown()
+        os.unlink(database.name)
+
+    failed = 0
+    for name, passed in results:
+        failed += not passed
+        print(f'[{"OK" if passed else "FAIL"}] {name}')
+
+    print(f'\n{len(results) - failed}/{len(results)} checks passed.')
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
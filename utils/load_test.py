@@ -0,0 +1,298 @@
+from pathlib import Path
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Actions each player takes, per player per second (change with --rate name=value)
+DEFAULT_RATES = {
+    'poll_growing': 1.0,
+    'inventory': 0.2,
+    'buy': 0.2,
+    'plant': 0.3,
+    'harvest': 0.1,
+    'sell': 0.1,
+    'chat': 0.5,
+}
+
+class Recorder:
+    """Collects latencies per endpoint and socket event"""
+
+    def __init__(self):
+        self.timings = {} # name --> [seconds]
+        self.errors = {} # name --> count
+
+    def time(self, name, call):
+        start = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            self.timings.setdefault(name, []).append(time.perf_counter() - start)
+        if getattr(result, 'status_code', 200) >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return result
+
+    def summary(self, elapsed):
+        results = {}
+        for name, times in sorted(self.timings.items()):
+            times = sorted(times)
+            results[name] = {
+                'count': len(times),
+                'errors': self.errors.get(name, 0),
+                'throughput': len(times) / elapsed,
+                'mean_ms': sum(times) / len(times) * 1000,
+                'p50_ms': percentile(times, 0.50) * 1000,
+                'p95_ms': percentile(times, 0.95) * 1000,
+                'p99_ms': percentile(times, 0.99) * 1000,
+            }
+        return results
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+class Player:
+    """One simulated player with an HTTP session and a socket"""
+
+    def __init__(self, app, socketio, number):
+        self.app = app
+        self.socketio = socketio
+        self.recorder = None # Swapped between the setup and play phases
+        self.name = f'load{number}'
+        self.http = app.test_client()
+        self.socket = None
+        self.room_id = None
+
+    def request(self, method, url, name=None, **kwargs):
+        return self.recorder.time(name or f'{method} {url}', lambda: self.http.open(url, method=method, **kwargs))
+
+    def emit(self, event, data):
+        return self.recorder.time(f'socket {event}', lambda: self.socket.emit(event, data))
+
+    def register(self):
+        self.request('POST', '/register', data={
+            'email': f'{self.name}@example.com',
+            'username': self.name,
+            'password': 'password1',
+            'confirm_password': 'password1'
+        })
+        self.request('POST', '/login', data={'email': f'{self.name}@example.com', 'password': 'password1'})
+
+    def create_room(self):
+        response = self.request('POST', '/rooms/create', data={'name': f'{self.name} room', 'max_members': '10'})
+        self.room_id = int(response.location.rstrip('/').rsplit('/', 1)[1])
+
+    def join_room(self, room_id):
+        self.request('POST', '/api/rooms/join', json={'room_id': room_id})
+        self.room_id = room_id
+
+    def connect(self):
+        self.socket = self.recorder.time('socket connect', lambda: self.socketio.test_client(self.app, flask_test_client=self.http))
+        self.emit('join', {'room_id': str(self.room_id)})
+
+    # Actions
+
+    def poll_growing(self):
+        self.request('GET', '/api/plants/growing')
+
+    def inventory(self):
+        return self.request('GET', '/api/inventory').get_json()
+
+    def buy(self):
+        self.request('POST', '/api/shop/buy', json={'seed_id': random.randint(1, 8), 'quantity': random.randint(1, 3)})
+
+    def plant(self):
+        seeds = self.inventory()['seeds']
+        if seeds:
+            self.request('POST', '/api/plants/plant-seed', json={'seed_id': random.choice(seeds)['id']})
+
+    def harvest(self):
+        # Skip the wait for plants to grow
+        ripen(self.app, self.name)
+        self.request('POST', '/api/plants/harvest-all')
+
+    def sell(self):
+        plants = self.inventory()['plants']
+        if plants:
+            self.request('POST', '/api/shop/sell', json={'inv_entry_id': random.choice(plants)['id']})
+
+    def chat(self):
+        self.emit('chat', {'room_id': self.room_id, 'message': f'hello from {self.name}'})
+
+    def play(self, rates, until, sleep):
+        """Take actions at the given rates (Poisson arrivals) until the deadline"""
+        actions = list(rates)
+        weights = [rates[action] for action in actions]
+        total_rate = sum(weights)
+
+        while time.perf_counter() < until:
+            sleep(random.expovariate(total_rate))
+            if time.perf_counter() >= until:
+                break
+            action = random.choices(actions, weights)[0]
+            try:
+                getattr(self, action)()
+            except Exception as e:
+                print(f'{self.name} {action} failed: {e}')
+            self.socket.get_received() # Drop pushed events
+
+def ripen(app, username):
+    """Finish growing a player's plants"""
+    from models.database import db
+    from models.user import User
+    from models.growing_plant import GrowingPlant
+
+    with app.app_context():
+        user_id = db.session.query(User.id).filter(User.username == username).scalar()
+        db.session.execute(db.update(GrowingPlant).where(
+            GrowingPlant.user_id == user_id
+        ).values(ready_at=datetime.now(timezone.utc)))
+        db.session.commit()
+
+def fund_players(app):
+    from models.database import db
+    from models.user import User
+
+    with app.app_context():
+        db.session.execute(db.update(User).where(User.username.like('load%')).values(currency=10 ** 7))
+        db.session.commit()
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def print_results(results, baseline=None):
+    print(f'{"endpoint / event":<36}{"count":>8}{"errors":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+          + (f'{"p50 vs base":>13}' if baseline else ''))
+    for name, stats in results.items():
+        line = (f'{name:<36}{stats["count"]:>8}{stats["errors"]:>8}{stats["throughput"]:>9.1f}'
+                f'{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}{stats["p99_ms"]:>9.2f}')
+        if baseline and name in baseline:
+            old = baseline[name]['p50_ms']
+            line += f'{(stats["p50_ms"] - old) / old * 100 if old else 0:>+12.1f}%'
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate players over HTTP and Socket.IO against a fresh database")
+    parser.add_argument('--players', type=int, default=20, help="Simulated players (default: 20)")
+    parser.add_argument('--room-size', type=int, default=5, help="Players per room (default: 5)")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to play for (default: 30)")
+    parser.add_argument('--rate', action='append', default=[], metavar='ACTION=PER_SECOND',
+                        help=f"Action rate per player, repeatable (actions: {', '.join(DEFAULT_RATES)})")
+    parser.add_argument('--database-url', help="Database to use (default: fresh temporary SQLite file)")
+    parser.add_argument('--output', help="Save results as JSON")
+    parser.add_argument('--compare', help="JSON results from an earlier run to compare p50s against")
+    parser.add_argument('--seed', type=int, help="Random seed for repeatable runs")
+    args = parser.parse_args()
+
+    rates = dict(DEFAULT_RATES)
+    for rate in args.rate:
+        action, _, value = rate.partition('=')
+        if action not in rates:
+            parser.error(f'unknown action: {action}')
+        rates[action] = float(value)
+    rates = {action: rate for action, rate in rates.items() if rate > 0}
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    database = None
+    if not args.database_url:
+        database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database.close()
+        args.database_url = f'sqlite:///{database.name}'
+
+    # Must be set before the config is imported
+    os.environ.setdefault('FLASK_ENV', 'development')
+    os.environ.setdefault('SECRET_KEY', 'load-test')
+    os.environ['DEV_DATABASE_URL'] = args.database_url
+
+    try:
+        import eventlet
+        from app import create_app, socketio
+        import logging
+
+        app = create_app()
+        app.logger.setLevel(logging.WARNING)
+        players = [Player(app, socketio, i) for i in range(args.players)]
+        pool = eventlet.GreenPool(args.players)
+
+        # Set up: register, fill rooms and connect sockets
+        setup = Recorder()
+        for player in players:
+            player.recorder = setup
+        start = time.perf_counter()
+        list(pool.imap(Player.register, players))
+        fund_players(app)
+        for i in range(0, len(players), args.room_size):
+            leader, *members = players[i:i + args.room_size]
+            leader.create_room()
+            for member in members:
+                member.join_room(leader.room_id)
+        list(pool.imap(Player.connect, players))
+        setup_elapsed = time.perf_counter() - start
+        print(f'{args.players} players in {len(range(0, args.players, args.room_size))} rooms ready in {setup_elapsed:.1f}s')
+
+        # Play
+        recorder = Recorder()
+        for player in players:
+            player.recorder = recorder
+        start = time.perf_counter()
+        until = start + args.duration
+        list(pool.imap(lambda player: player.play(rates, until, eventlet.sleep), players))
+        elapsed = time.perf_counter() - start
+
+        for player in players:
+            player.socket.disconnect()
+    finally:
+        if database:
+            os.unlink(database.name)
+
+    setup_results = setup.summary(setup_elapsed)
+    results = recorder.summary(elapsed)
+    total = sum(stats['count'] for stats in results.values())
+
+    baseline = {'setup': None, 'results': None}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print('\nSetup:')
+    print_results(setup_results, baseline['setup'])
+    print(f'\nPlay ({args.duration:g}s):')
+    print_results(results, baseline['results'])
+    print(f'\n{total} operations in {elapsed:.1f}s ({total / elapsed:.1f}/s)')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'date': datetime.now(timezone.utc).isoformat(),
+                'players': args.players,
+                'room_size': args.room_size,
+                'duration': elapsed,
+                'rates': rates,
+                'database': args.database_url.split(':', 1)[0],
+                'setup': setup_results,
+                'results': results
+            }, f, indent=2)
+        print(f'Results saved to {args.output}')
+
+if __name__ == "__main__":
+    main()
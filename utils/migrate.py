@@ -0,0 +1,49 @@
+import argparse
+from pathlib import Path
+import sys
+
+# Get the project root directory
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add to Python path
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import create_app
+from models.database import db
+from models.migrations import MIGRATIONS, get_schema_version, upgrade
+
+def status():
+    """List migrations and whether they have been applied"""
+    current = get_schema_version()
+    db.session.commit()
+    print(f'\nSchema version: {current}')
+    for version, description, _ in MIGRATIONS:
+        print(f'[{"x" if version <= current else " "}] {version}. {description}')
+
+def main():
+    # Create the parser
+    parser = argparse.ArgumentParser(
+        description='Database Migrator - Tool for bringing the database schema up to date'
+    )
+
+    # Arguments
+    parser.add_argument(
+        'action',
+        choices=['upgrade', 'status'],
+        help='Action to perform.'
+    )
+
+    # Parse the arguments
+    args = parser.parse_args()
+
+    # create_app() already upgrades the database on start up
+    app = create_app(start_services=False)
+    with app.app_context():
+        if args.action == 'upgrade':
+            upgrade()
+            print('\nDatabase is up to date.')
+        status()
+
+if __name__ == "__main__":
+    main()